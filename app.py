@@ -1,6 +1,15 @@
+import os
+import time
+
 import streamlit as st
 
-from rag_pipelines import load_documents, create_vectorstore, build_pasal_index, route_question
+from rag_pipelines import route_question_stream
+from ingest_jobs import InMemoryFile, IngestJob, get_ingest_queue
+from index_registry import get_index_registry
+from index_store import file_digest, index_key
+from metrics import get_metrics, setup_metrics
+from semantic_cache import semantic_cache_stats
+from warmup import ModelWarmup
 from htmlTemplates import css, header_html, bot_template, user_template
 
 
@@ -9,8 +18,8 @@ def render_message(role: str, content: str):
     tpl = user_template if role == "user" else bot_template
     st.markdown(tpl.replace("{{MSG}}", content), unsafe_allow_html=True)
 
-def render_typing():
-    st.markdown(
+def render_typing(container=st):
+    container.markdown(
         """
         <div class="tm-row bot">
           <div class="tm-avatar bot">⚖️</div>
@@ -24,21 +33,23 @@ def format_sources_with_snippet(docs, max_items=8):
     seen = set()
     out = []
     for d in docs:
-        src = d.metadata.get("source", "unknown")
-        page = d.metadata.get("page", None)
-        key = (src, page)
-        if key in seen:
-            continue
-        seen.add(key)
-
         snippet = " ".join((d.page_content or "").split())[:220]
-        if page is not None:
-            out.append(f"{src} (halaman {page}) — \"{snippet}...\"")
-        else:
-            out.append(f"{src} — \"{snippet}...\"")
+        # chunk yang di-dedupe: teks sama juga ada di sumber lain
+        for ref in [d.metadata] + list(d.metadata.get("duplicates", ())):
+            src = ref.get("source", "unknown")
+            page = ref.get("page", None)
+            key = (src, page)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if page is not None:
+                out.append(f"{src} (halaman {page}) — \"{snippet}...\"")
+            else:
+                out.append(f"{src} — \"{snippet}...\"")
 
-        if len(out) >= max_items:
-            break
+            if len(out) >= max_items:
+                return out
     return out
 
 
@@ -52,9 +63,19 @@ def init_state():
     st.session_state.setdefault("chat_history_ui", [])  # list[{role, content}]
     st.session_state.setdefault("last_sources_docs", None)
     st.session_state.setdefault("last_files_sig", None)
+    st.session_state.setdefault("index_key", None)
+    st.session_state.setdefault("doc_ids", {})  # doc_id -> filename
+    st.session_state.setdefault("index_lease", None)  # IndexLease ke registry bersama
+    st.session_state.setdefault("ingest_job", None)  # IngestJob yang sedang jalan
 
 
 def reset_all():
+    if st.session_state.ingest_job is not None:
+        st.session_state.ingest_job.cancel()
+    st.session_state.ingest_job = None
+    if st.session_state.index_lease is not None:
+        st.session_state.index_lease.release()
+    st.session_state.index_lease = None
     st.session_state.vectorstore = None
     st.session_state.pasal_index = None
     st.session_state.docs_loaded = False
@@ -64,6 +85,8 @@ def reset_all():
     st.session_state.chat_history_ui = []
     st.session_state.last_sources_docs = None
     st.session_state.last_files_sig = None
+    st.session_state.index_key = None
+    st.session_state.doc_ids = {}
 
 
 def files_signature(files):
@@ -72,11 +95,112 @@ def files_signature(files):
     return tuple((f.name, getattr(f, "size", None)) for f in files)
 
 
+def apply_finished_job():
+    """Pindahkan hasil IngestJob yang sudah selesai ke session (tiap rerun)."""
+    job = st.session_state.ingest_job
+    if job is None or not job.finished:
+        return
+    st.session_state.ingest_job = None
+
+    if job.state == "cancelled":
+        st.session_state.status_kind = "err"
+        st.session_state.status_text = "Processing dibatalkan."
+        return
+    if job.state == "failed":
+        st.session_state.status_kind = "err"
+        st.session_state.status_text = "Processing gagal: " + str(job.error)
+        return
+
+    if st.session_state.index_lease is not None:
+        st.session_state.index_lease.release()
+    lease = job.lease
+    st.session_state.index_lease = lease
+    st.session_state.vectorstore = lease.vectorstore
+    st.session_state.pasal_index = lease.pasal_index
+    st.session_state.status_text = (
+        job.status_text if job.created
+        else "Index yang sama sudah aktif, dipakai bersama."
+    )
+
+    st.session_state.docs_loaded = True
+    st.session_state.last_files_sig = files_signature(job.files)
+    st.session_state.index_key = job.key
+    st.session_state.doc_ids = {file_digest(f): f.name for f in job.files}
+    st.session_state.active_docs = [f.name for f in job.files]
+    st.session_state.status_kind = "ok"
+
+
+def describe_job(job) -> str:
+    p = job.progress
+    if job.stage == "queued":
+        return "Menunggu antrian..."
+    if job.stage == "loading":
+        return f"Load dokumen... {p.get('pages', 0)} halaman"
+    if job.stage == "pasal_index":
+        return "Pasal index siap (pertanyaan Pasal/BAB sudah bisa). Mulai embedding..."
+    if job.stage == "embedding":
+        total = p.get("total")
+        done = p.get("done", 0)
+        return f"Embedding chunk {done}/{total}" if total else f"Embedding chunk {done}"
+    if job.stage == "saving":
+        return "Menyimpan index..."
+    return job.stage
+
+
+def _ingest_progress():
+    job = st.session_state.ingest_job
+    if job is None:
+        return
+    if job.finished:
+        st.rerun()
+
+    total = job.progress.get("total")
+    fraction = job.progress.get("done", 0) / total if job.stage == "embedding" and total else 0.0
+    st.progress(min(fraction, 1.0), text=describe_job(job))
+    if st.button("✖️ Cancel", key="cancel_ingest", use_container_width=True):
+        job.cancel()
+
+
+# refresh panel progress tiap detik tanpa rerun seluruh halaman (Streamlit >= 1.33)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+ingest_progress = _fragment(run_every=1)(_ingest_progress) if _fragment else _ingest_progress
+
+
+@st.cache_resource
+def get_model_warmup() -> ModelWarmup:
+    # satu warm-up + heartbeat per proses server, bukan per sesi
+    return ModelWarmup().start()
+
+
+@st.cache_resource
+def start_metrics():
+    # JSON log + endpoint Prometheus, sekali per proses server
+    return setup_metrics()
+
+
+def render_debug_panel():
+    """Latency per stage + statistik cache/registry (DEBUG_PANEL=1)."""
+    with st.expander("🔧 Debug: latency & cache"):
+        st.markdown("**Latency per stage**")
+        st.dataframe(get_metrics().summary(), use_container_width=True, hide_index=True)
+        st.markdown("**Span terakhir**")
+        st.dataframe(list(get_metrics().recent)[-20:][::-1], use_container_width=True, hide_index=True)
+        st.markdown("**Semantic cache**")
+        st.json(semantic_cache_stats())
+        st.markdown("**Index registry**")
+        st.json(get_index_registry().stats())
+
+
 # ---------- App ----------
 def main():
     st.set_page_config(page_title="Legal Assistant", page_icon="⚖️", layout="wide", initial_sidebar_state="expanded")
     st.markdown(css, unsafe_allow_html=True)
     init_state()
+    apply_finished_job()
+
+    warmup = get_model_warmup()
+    warmup.touch()
+    start_metrics()
 
     # ---------- Sidebar ----------
     with st.sidebar:
@@ -123,21 +247,28 @@ def main():
                         st.session_state.docs_loaded = True
                         st.session_state.status_kind = "ok"
                         st.session_state.status_text = "File belum berubah. Index dipakai ulang."
+                    elif st.session_state.ingest_job is not None:
+                        st.session_state.status_kind = "err"
+                        st.session_state.status_text = "Masih ada proses berjalan. Tunggu selesai atau Cancel."
                     else:
-                        with st.spinner("Processing (load → pasal index → vectorstore)..."):
-                            docs = load_documents(uploaded_files)
-                            st.session_state.pasal_index = build_pasal_index(docs)
-                            st.session_state.vectorstore = create_vectorstore(docs)
-                            st.session_state.docs_loaded = True
-                            st.session_state.last_files_sig = sig
-                            st.session_state.active_docs = [f.name for f in uploaded_files]
-
-                        st.session_state.status_kind = "ok"
-                        st.session_state.status_text = "Document uploaded and processed successfully."
+                        files = [InMemoryFile.from_upload(f) for f in uploaded_files]
+                        base = None
+                        if st.session_state.vectorstore is not None and st.session_state.doc_ids:
+                            base = (
+                                st.session_state.vectorstore,
+                                st.session_state.pasal_index,
+                                dict(st.session_state.doc_ids),
+                            )
+                        job = IngestJob(index_key(files), files, base)
+                        st.session_state.ingest_job = get_ingest_queue().submit(job)
+                        st.session_state.status_kind = None
+                        st.session_state.status_text = None
                 except Exception as e:
                     st.session_state.status_kind = "err"
                     st.session_state.status_text = "Processing gagal: " + str(e)
 
+        ingest_progress()
+
         # Status box
         if st.session_state.status_text:
             kind = st.session_state.status_kind or "ok"
@@ -169,6 +300,16 @@ def main():
 
         st.markdown("</div>", unsafe_allow_html=True)
 
+        # Models (warm-up status) card
+        st.markdown('<div class="sb-card">', unsafe_allow_html=True)
+        st.markdown("<h3>Models</h3>", unsafe_allow_html=True)
+        st.markdown(
+            f'<div class="sb-muted">LLM: <b>{warmup.status["llm"]}</b><br/>'
+            f'Embeddings: <b>{warmup.status["embeddings"]}</b></div>',
+            unsafe_allow_html=True,
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+
     # ---------- Main header ----------
     hcol1, hcol2 = st.columns([8, 2])
     with hcol1:
@@ -223,32 +364,52 @@ def main():
             sources = format_sources_with_snippet(st.session_state.last_sources_docs, max_items=10)
             st.markdown("\n".join([f"- {s}" for s in sources]))
 
+    if os.getenv("DEBUG_PANEL", "0") == "1":
+        render_debug_panel()
+
     # ---------- Input ----------
     user_query = st.chat_input("Tulis pertanyaan hukum kamu di sini...")
     if user_query:
         st.session_state.chat_history_ui.append({"role": "user", "content": user_query})
 
-        if not st.session_state.docs_loaded or st.session_state.vectorstore is None or st.session_state.pasal_index is None:
+        vectorstore = st.session_state.vectorstore
+        pasal_index = st.session_state.pasal_index
+        job = st.session_state.ingest_job
+        if job is not None and job.pasal_index is not None:
+            # pasal index baru sudah jadi, embedding masih jalan di background
+            vectorstore, pasal_index = job.vectorstore, job.pasal_index
+
+        if pasal_index is None:
             st.session_state.chat_history_ui.append({
                 "role": "bot",
                 "content": "Silakan upload dokumen dulu di panel kiri, lalu klik **Upload & Process**.",
             })
             st.rerun()
 
-        # Call router
-        # tampilkan typing indicator
-        render_typing()
-        with st.spinner("Menganalisis dokumen..."):
-            answer, src_docs = route_question(
-                st.session_state.vectorstore,
-                st.session_state.pasal_index,
-                user_query
-            )
+        # tampilkan typing indicator selama retrieval, lalu stream token ke bubble
+        bubble = st.empty()
+        render_typing(bubble)
+        tokens, src_docs = route_question_stream(
+            vectorstore,
+            pasal_index,
+            user_query,
+            index_version=st.session_state.index_key,
+        )
+
+        answer = ""
+        for token in tokens:
+            answer += token
+            bubble.markdown(bot_template.replace("{{MSG}}", answer), unsafe_allow_html=True)
 
         st.session_state.chat_history_ui.append({"role": "bot", "content": answer})
         st.session_state.last_sources_docs = src_docs
         st.rerun()
 
+    if st.session_state.ingest_job is not None and _fragment is None:
+        # Streamlit lama tanpa fragment: polling dengan rerun penuh
+        time.sleep(1)
+        st.rerun()
+
 
 if __name__ == "__main__":
     main()
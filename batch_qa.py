@@ -0,0 +1,159 @@
+"""
+Batch tanya-jawab tanpa UI: load / build index untuk sekumpulan dokumen,
+jawab semua pertanyaan di file JSONL, tulis hasilnya ke JSONL.
+
+Input (satu objek per baris): {"question": "...", ...field lain bebas}
+Output: field input + answer, route, sources, latency_ms (+ error kalau gagal),
+urutan sama dengan input.
+
+Index memakai cache yang sama dengan app (CACHE_DIR/indexes/<index_key>),
+jadi dokumen yang sama tidak di-embed ulang antar run. Embedding query
+route LLM dihitung di depan per batch (lewat cache embedding), lalu
+pertanyaan dijawab paralel oleh `--workers` thread.
+
+Contoh:
+    python batch_qa.py uu_27_2022.pdf uu_11_2008.pdf -q pertanyaan.jsonl -o jawaban.jsonl
+    python batch_qa.py docs/*.pdf -q pertanyaan.jsonl --workers 8 --no-answer-cache
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from index_store import index_key, load_index, save_index
+from ingest_jobs import InMemoryFile
+from metrics import get_metrics
+from rag_pipelines import ingest_documents, rag_query, routed_answer_stream
+
+
+def read_files(paths: List[str]) -> List[InMemoryFile]:
+    files = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            files.append(InMemoryFile(os.path.basename(path), fh.read()))
+    return files
+
+
+def read_questions(path: str) -> List[dict]:
+    items = []
+    with open(path, encoding="utf-8") as fh:
+        for n, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            if not item.get("question"):
+                raise ValueError(f"{path}:{n}: field 'question' kosong")
+            items.append(item)
+    return items
+
+
+def open_index(files: List[InMemoryFile]) -> Tuple[object, object, str]:
+    """Return (vectorstore, pasal_index, key); build + simpan kalau belum ada di cache."""
+    key = index_key(files)
+    cached = load_index(key)
+    if cached is not None:
+        print(f"index {key[:12]} dari cache", file=sys.stderr)
+        return cached[0], cached[1], key
+
+    start = time.perf_counter()
+    vectorstore, pasal_index = ingest_documents(files)
+    if vectorstore is None:
+        raise ValueError("Tidak ada teks yang bisa diindeks dari dokumen.")
+    save_index(key, vectorstore, pasal_index)
+    print(f"index {key[:12]} dibangun dalam {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return vectorstore, pasal_index, key
+
+
+def embed_queries(vectorstore, questions: List[str], batch_size: int) -> Dict[str, List[float]]:
+    """
+    Embedding teks retrieval (rag_query) semua pertanyaan, per batch.
+    Route pasal/BAB tidak butuh embedding, tapi baru ketahuan saat routing;
+    sisa embedding itu murah dibanding satu request per pertanyaan.
+    embed_documents == embed_query untuk provider di embedding_factory
+    (tanpa prefix query), dan ikut cache embedding: run ulang pertanyaan
+    yang sama tidak meng-embed lagi.
+    """
+    texts = list(dict.fromkeys(rag_query(q)[1] for q in questions))
+    vectors: Dict[str, List[float]] = {}
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i:i + batch_size]
+        vectors.update(zip(batch, vectorstore.embeddings.embed_documents(batch)))
+    return vectors
+
+
+def _sources(docs) -> List[dict]:
+    out = []
+    for d in docs:
+        meta = d.metadata
+        out.append({k: meta[k] for k in ("source", "page", "pasal", "bab") if meta.get(k) is not None})
+    return out
+
+
+def answer_one(vectorstore, pasal_index, item: dict, index_version: Optional[str],
+               query_vectors: Dict[str, List[float]]) -> dict:
+    start = time.perf_counter()
+    out = dict(item)
+    try:
+        route, (tokens, docs) = routed_answer_stream(
+            vectorstore, pasal_index, item["question"], index_version, query_vectors,
+        )
+        out.update(answer="".join(tokens), route=route, sources=_sources(docs))
+    except Exception as e:
+        out.update(answer=None, route=None, sources=[], error=f"{type(e).__name__}: {e}")
+    out["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="dokumen (.pdf / .docx / .txt)")
+    parser.add_argument("-q", "--questions", required=True, help="JSONL pertanyaan")
+    parser.add_argument("-o", "--output", help="JSONL jawaban (default: stdout)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_QA_WORKERS", "4")),
+                        help="pertanyaan yang dijawab bersamaan (default: BATCH_QA_WORKERS atau 4)")
+    parser.add_argument("--embed-batch", type=int, default=64, help="query per batch embedding")
+    parser.add_argument("--no-answer-cache", action="store_true",
+                        help="matikan response & semantic cache (selalu panggil LLM)")
+    args = parser.parse_args()
+
+    items = read_questions(args.questions)
+    vectorstore, pasal_index, key = open_index(read_files(args.files))
+    index_version = None if args.no_answer_cache else key
+
+    start = time.perf_counter()
+    query_vectors = embed_queries(vectorstore, [item["question"] for item in items], max(1, args.embed_batch))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            # map() menjaga urutan; baris ditulis begitu jawabannya siap
+            results = pool.map(
+                lambda item: answer_one(vectorstore, pasal_index, item, index_version, query_vectors), items,
+            )
+            for result in results:
+                failed += "error" in result
+                out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(items)} pertanyaan dalam {elapsed:.1f}s ({len(items) / elapsed:.2f}/s), {failed} gagal",
+        file=sys.stderr,
+    )
+    print(json.dumps(get_metrics().summary(), indent=2), file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmark suite offline (korpus UU sintetis + fake Ollama), lihat run.py."""
@@ -0,0 +1,92 @@
+"""
+Cek cepat semua FAISS_INDEX_TYPE, offline (embedding fake, tanpa Ollama):
+build lewat VectorIndexBuilder -> MMR search (jalur route LLM) -> simpan &
+load ulang -> delete_vectors -> clone_vectorstore, MMR di tiap langkah.
+
+Contoh:
+    python -m benchmarks.check_index
+    python -m benchmarks.check_index --vectors 2000 --types ivf,ivfpq
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.fake_ollama import fake_embedding
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [fake_embedding(t, self.dim) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return fake_embedding(text, self.dim)
+
+
+def check(kind: str, n: int, dim: int, workdir: str) -> None:
+    from langchain_community.vectorstores import FAISS
+
+    from vector_index import VectorIndexBuilder, apply_search_params, clone_vectorstore, delete_vectors
+
+    os.environ["FAISS_INDEX_TYPE"] = kind
+    embeddings = FakeEmbeddings(dim)
+    texts = [f"pasal {i} ayat {i % 7} kewajiban pengendali data pribadi {i % 13}" for i in range(n)]
+    ids = [f"doc:{i}" for i in range(n)]
+
+    builder = VectorIndexBuilder(embeddings)
+    builder.add(texts, embeddings.embed_documents(texts), [{"i": i} for i in range(n)], ids)
+    vectorstore = builder.finish()
+
+    def mmr(vs, step: str) -> None:
+        docs = vs.max_marginal_relevance_search_by_vector(embeddings.embed_query(texts[3]), k=4, fetch_k=12)
+        if not docs:
+            raise AssertionError(f"{step}: MMR tanpa hasil")
+
+    mmr(vectorstore, "build")
+
+    # sama dengan index_store.save_index / load_index
+    path = os.path.join(workdir, kind)
+    vectorstore.save_local(path)
+    loaded = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    apply_search_params(loaded.index)
+    mmr(loaded, "load")
+
+    delete_vectors(loaded, ids[: n // 10])
+    mmr(loaded, "delete")
+    mmr(clone_vectorstore(loaded), "clone")
+
+    print(f"{kind:6s} {type(vectorstore.index).__name__:14s} ok ({loaded.index.ntotal} vektor)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--types", default="flat,hnsw,ivf,ivfpq", help="subset FAISS_INDEX_TYPE")
+    parser.add_argument("--vectors", type=int, default=400)
+    parser.add_argument("--dim", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="rag_check_") as tmp:
+        os.environ["CACHE_DIR"] = tmp
+        # korpus kecil tetap memakai ANN yang diminta, bukan fallback flat
+        os.environ.setdefault("FAISS_ANN_MIN_VECTORS", str(min(100, args.vectors)))
+        os.environ.setdefault("FAISS_TRAIN_SIZE", str(args.vectors))
+
+        failed = 0
+        for kind in args.types.split(","):
+            try:
+                check(kind.strip(), args.vectors, args.dim, tmp)
+            except Exception as e:
+                failed += 1
+                print(f"{kind:6s} GAGAL: {type(e).__name__}: {e}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
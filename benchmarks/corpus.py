@@ -0,0 +1,194 @@
+"""
+Generator korpus UU sintetis (BAB -> Pasal -> ayat, termasuk BAB ketentuan
+pidana) untuk benchmark. Output deterministik untuk seed yang sama.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+
+ROMAN = [
+    (1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+    (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I"),
+]
+
+TOPICS = [
+    "Perlindungan Data Pribadi", "Ketenagakerjaan", "Perlindungan Konsumen",
+    "Informasi dan Transaksi Elektronik", "Pengelolaan Lingkungan Hidup",
+    "Perbankan", "Penanaman Modal", "Keterbukaan Informasi Publik",
+]
+
+BAB_TITLES = [
+    "KETENTUAN UMUM", "ASAS DAN TUJUAN", "HAK DAN KEWAJIBAN", "LARANGAN",
+    "KELEMBAGAAN", "PENGAWASAN", "PERAN SERTA MASYARAKAT", "PENYELESAIAN SENGKETA",
+    "SANKSI ADMINISTRATIF", "KETENTUAN PERALIHAN",
+]
+
+SUBJECTS = [
+    "Setiap Orang", "Pengendali Data Pribadi", "Pelaku Usaha", "Pemberi Kerja",
+    "Penyelenggara Sistem Elektronik", "Badan Publik", "Pemerintah Daerah", "Menteri",
+]
+
+VERBS = [
+    "wajib", "berhak", "dilarang", "dapat", "bertanggung jawab untuk",
+    "wajib memastikan", "wajib menyampaikan laporan mengenai",
+]
+
+OBJECTS = [
+    "melindungi kerahasiaan data", "memberikan informasi yang benar dan jelas",
+    "melakukan pemrosesan secara terbatas dan spesifik", "menyediakan sarana pengaduan",
+    "menjaga keamanan sistem elektronik", "memenuhi standar pelayanan minimal",
+    "melakukan penilaian dampak", "mencatat seluruh kegiatan pemrosesan",
+    "menghapus data yang tidak lagi diperlukan", "menunjuk pejabat pelaksana",
+]
+
+CLAUSES = [
+    "sesuai dengan ketentuan peraturan perundang-undangan",
+    "dalam jangka waktu paling lambat 3 x 24 (tiga kali dua puluh empat) jam",
+    "dengan memperhatikan prinsip kehati-hatian",
+    "berdasarkan persetujuan yang sah",
+    "sebagaimana dimaksud pada ayat (1)",
+    "kecuali ditentukan lain dalam Undang-Undang ini",
+]
+
+
+def roman(n: int) -> str:
+    out = []
+    for value, sym in ROMAN:
+        while n >= value:
+            out.append(sym)
+            n -= value
+    return "".join(out)
+
+
+@dataclass
+class Statute:
+    name: str
+    number: int
+    year: int
+    topic: str
+    text: str
+    pasals: List[int] = field(default_factory=list)
+    babs: List[str] = field(default_factory=list)
+    sanction_pasals: List[int] = field(default_factory=list)
+
+
+def _sentence(rng: random.Random) -> str:
+    return (
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} "
+        f"{rng.choice(CLAUSES)}."
+    )
+
+
+def generate_statute(number: int, year: int, n_pasal: int, seed: int) -> Statute:
+    """
+    Satu UU dengan `n_pasal` pasal, dibagi ke beberapa BAB; BAB terakhir
+    selalu KETENTUAN PIDANA (pasal sanksi penjara/denda).
+    """
+    rng = random.Random(seed)
+    topic = rng.choice(TOPICS)
+    n_bab = max(2, min(len(BAB_TITLES) + 1, n_pasal // 8 + 1))
+    n_sanction = max(1, n_pasal // 10)
+    regular = n_pasal - n_sanction
+
+    lines = [
+        "UNDANG-UNDANG REPUBLIK INDONESIA",
+        f"NOMOR {number} TAHUN {year}",
+        "TENTANG",
+        topic.upper(),
+        "",
+        "DENGAN RAHMAT TUHAN YANG MAHA ESA",
+        "PRESIDEN REPUBLIK INDONESIA,",
+        "",
+    ]
+    statute = Statute(f"uu_{number}_{year}.txt", number, year, topic, "")
+
+    per_bab = max(1, regular // (n_bab - 1))
+    pasal_no = 1
+    for b in range(1, n_bab):
+        bab = roman(b)
+        statute.babs.append(bab)
+        lines += [f"BAB {bab}", BAB_TITLES[(b - 1) % len(BAB_TITLES)], ""]
+        last = regular if b == n_bab - 1 else min(regular, pasal_no + per_bab - 1)
+        while pasal_no <= last:
+            lines += [f"Pasal {pasal_no}"]
+            for ayat in range(1, rng.randint(1, 4) + 1):
+                lines.append(f"({ayat}) " + " ".join(_sentence(rng) for _ in range(rng.randint(1, 3))))
+            lines.append("")
+            statute.pasals.append(pasal_no)
+            pasal_no += 1
+
+    bab = roman(n_bab)
+    statute.babs.append(bab)
+    lines += [f"BAB {bab}", "KETENTUAN PIDANA", ""]
+    for _ in range(n_sanction):
+        ref = rng.choice(statute.pasals) if statute.pasals else 1
+        years = rng.randint(1, 10)
+        fine = rng.randint(1, 50) * 100
+        lines += [
+            f"Pasal {pasal_no}",
+            f"(1) Setiap Orang yang dengan sengaja melanggar ketentuan sebagaimana dimaksud "
+            f"dalam Pasal {ref} dipidana dengan pidana penjara paling lama {years} ({years}) tahun "
+            f"dan/atau pidana denda paling banyak Rp{fine}.000.000,00.",
+            f"(2) Selain sanksi pidana sebagaimana dimaksud pada ayat (1), pelaku dapat dikenai "
+            f"sanksi administratif berupa ganti rugi dan pencabutan izin.",
+            "",
+        ]
+        statute.pasals.append(pasal_no)
+        statute.sanction_pasals.append(pasal_no)
+        pasal_no += 1
+
+    statute.text = "\n".join(lines)
+    return statute
+
+
+def generate_corpus(n_docs: int, pasal_per_doc: int, seed: int = 0) -> List[Statute]:
+    return [
+        generate_statute(number=i + 1, year=2000 + (seed + i) % 25, n_pasal=pasal_per_doc, seed=seed * 1000 + i)
+        for i in range(n_docs)
+    ]
+
+
+# kind -> template; kind dipakai sebagai label latency per jenis query
+QUERY_KINDS = ("sanction", "pasal", "pasal_ayat", "bab", "about", "summary", "obligations", "cases", "default")
+
+
+def query_mix(corpus: List[Statute], n: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    `n` pertanyaan (kind, query) yang mencakup semua route router,
+    bergiliran per kind supaya proporsinya sama di semua ukuran korpus.
+    """
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        kind = QUERY_KINDS[i % len(QUERY_KINDS)]
+        doc = rng.choice(corpus)
+        if kind == "sanction":
+            q = rng.choice(["Apa sanksi pidana dalam undang-undang ini?", "Berapa denda paling banyak?",
+                            "Pasal mana yang mengatur pidana penjara?"])
+        elif kind == "pasal":
+            q = f"Apa isi Pasal {rng.choice(doc.pasals)}?"
+        elif kind == "pasal_ayat":
+            q = f"Jelaskan Pasal {rng.choice(doc.pasals)} ayat (1)"
+        elif kind == "bab":
+            q = f"Tampilkan BAB {rng.choice(doc.babs)}"
+        elif kind == "about":
+            q = f"NOMOR {doc.number} TAHUN {doc.year} itu tentang apa?"
+        elif kind == "summary":
+            q = "Ringkas isi dokumen"
+        elif kind == "obligations":
+            q = f"Apa saja kewajiban {rng.choice(SUBJECTS)}?"
+        elif kind == "cases":
+            q = "Berikan contoh penerapan kasus"
+        else:
+            q = f"Bagaimana ketentuan mengenai {rng.choice(OBJECTS)}?"
+        out.append((kind, q))
+    return out
+
+
+SIZES: Dict[str, Tuple[int, int]] = {
+    # name: (jumlah dokumen, pasal per dokumen)
+    "small": (1, 40),
+    "medium": (4, 150),
+    "large": (12, 400),
+}
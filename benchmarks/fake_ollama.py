@@ -0,0 +1,197 @@
+"""
+Stand-in Ollama HTTP server yang deterministik, untuk benchmark offline.
+
+Endpoint: /api/embed, /api/embeddings, /api/chat, /api/generate, /api/tags.
+- Embedding: feature hashing token (sha1) ke vektor `dim` dimensi, dinormalisasi,
+  jadi teks yang berbagi kata tetap "mirip" dan hasil selalu sama.
+- Chat/generate: jawaban `tokens` kata yang dipilih dari prompt dengan seed
+  dari hash prompt; streaming NDJSON seperti Ollama asli.
+- Latency buatan opsional (--embed-ms per input, --token-ms per token) untuk
+  mensimulasikan model nyata; default 0 supaya yang terukur adalah pipeline.
+
+Jalankan terpisah:
+    python -m benchmarks.fake_ollama --port 11435
+lalu set OLLAMA_BASE_URL=http://127.0.0.1:11435
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    vec = [0.0] * dim
+    for token in WORD.findall(text.lower()):
+        h = hashlib.sha1(token.encode("utf-8")).digest()
+        idx = int.from_bytes(h[:4], "little") % dim
+        vec[idx] += 1.0 if h[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        vec[0] = 1.0
+        return vec
+    return [v / norm for v in vec]
+
+
+def fake_answer(prompt: str, n_tokens: int) -> List[str]:
+    words = WORD.findall(prompt) or ["jawaban"]
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    return ["Berdasarkan"] + [" " + rng.choice(words) for _ in range(max(0, n_tokens - 1))]
+
+
+class FakeOllama:
+    def __init__(self, dim: int = 384, tokens: int = 48, embed_ms: float = 0.0, token_ms: float = 0.0):
+        self.dim = dim
+        self.tokens = tokens
+        self.embed_ms = embed_ms
+        self.token_ms = token_ms
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if self.embed_ms:
+            time.sleep(self.embed_ms * len(texts) / 1000)
+        return [fake_embedding(t, self.dim) for t in texts]
+
+
+def _handler(fake: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            return
+
+        def _json(self, payload: dict, status: int = 200) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, chunks) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for payload in chunks:
+                line = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            fake.count()
+            if self.path.startswith("/api/tags"):
+                self._json({"models": [{"name": "fake:latest", "model": "fake:latest", "size": 0}]})
+            elif self.path in ("/", ""):
+                self._json({"status": "Ollama is running"})
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.end_headers()
+
+        def do_POST(self):
+            fake.count()
+            req = self._body()
+            model = req.get("model", "fake")
+
+            if self.path == "/api/embed":
+                texts = req.get("input", "")
+                texts = [texts] if isinstance(texts, str) else list(texts)
+                self._json({"model": model, "embeddings": fake.embed(texts)})
+
+            elif self.path == "/api/embeddings":
+                self._json({"embedding": fake.embed([req.get("prompt", "")])[0]})
+
+            elif self.path in ("/api/chat", "/api/generate"):
+                chat = self.path == "/api/chat"
+                if chat:
+                    prompt = "\n".join(m.get("content", "") for m in req.get("messages", []))
+                else:
+                    prompt = req.get("prompt", "")
+                # prompt kosong = preload model (lihat warmup.py)
+                tokens = fake_answer(prompt, fake.tokens) if prompt else []
+                self._generate(model, tokens, chat, req.get("stream", True))
+
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def _generate(self, model: str, tokens: List[str], chat: bool, stream: bool) -> None:
+            def payload(text: str, done: bool) -> dict:
+                out = {"model": model, "created_at": "1970-01-01T00:00:00Z", "done": done}
+                if chat:
+                    out["message"] = {"role": "assistant", "content": text}
+                else:
+                    out["response"] = text
+                if done:
+                    out.update(done_reason="stop", eval_count=len(tokens), prompt_eval_count=0)
+                return out
+
+            if not stream:
+                if fake.token_ms:
+                    time.sleep(fake.token_ms * len(tokens) / 1000)
+                self._json(payload("".join(tokens), True))
+                return
+
+            def chunks():
+                for t in tokens:
+                    if fake.token_ms:
+                        time.sleep(fake.token_ms / 1000)
+                    yield payload(t, False)
+                yield payload("", True)
+
+            self._stream(chunks())
+
+    return Handler
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, fake: Optional[FakeOllama] = None):
+    """Jalankan server di thread daemon. Return (server, base_url)."""
+    fake = fake or FakeOllama()
+    server = ThreadingHTTPServer((host, port), _handler(fake))
+    server.daemon_threads = True
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--tokens", type=int, default=48)
+    parser.add_argument("--embed-ms", type=float, default=0.0)
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeOllama(args.dim, args.tokens, args.embed_ms, args.token_ms)
+    server = ThreadingHTTPServer((args.host, args.port), _handler(fake))
+    print(f"fake ollama listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark ingest + query end-to-end, offline, dengan fake Ollama lokal.
+
+Per ukuran korpus (lihat corpus.SIZES) di proses terpisah (peak RSS bersih):
+  1. generate korpus UU sintetis (.txt)
+  2. ingest_documents -> throughput halaman/chunk per detik
+  3. query mix tetap lewat route_question -> latency p50/p95/p99 & QPS
+Hasil JSON mencatat commit git + semua knob env supaya bisa dibandingkan
+antar commit.
+
+Contoh:
+    python -m benchmarks.run --sizes small,medium --queries 90
+    python -m benchmarks.run --set CHUNK_SIZE=600 --set CHUNK_OVERLAP=100
+    python -m benchmarks.run --set RETRIEVAL_K=4 --set RETRIEVAL_FETCH_K=12
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+from benchmarks.corpus import SIZES, generate_corpus, query_mix
+from benchmarks.fake_ollama import FakeOllama, start_server
+
+
+# env yang mempengaruhi hasil; dicatat di output
+KNOBS = (
+    "CHUNKING", "CHUNK_SIZE", "CHUNK_OVERLAP", "RETRIEVAL_K", "RETRIEVAL_FETCH_K",
+    "CONTEXT_PACKING", "CONTEXT_TOKEN_BUDGET",
+    "EMBEDDING_PROVIDER", "INGEST_MODE", "INGEST_BATCH_SIZE", "LOAD_WORKERS",
+    "EMBED_BATCH_SIZE", "EMBED_CONCURRENCY", "EMBED_CACHE",
+    "FAISS_INDEX_TYPE", "FAISS_NPROBE", "FAISS_HNSW_EF_SEARCH",
+    "BOILERPLATE_STRIP", "DEDUPE_CHUNKS", "DEDUPE_NEAR_THRESHOLD",
+    "PDF_BACKEND", "PDF_PAGE_CACHE",
+    "DOCSTORE", "RESPONSE_CACHE", "SEMANTIC_CACHE",
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_commit() -> Dict[str, object]:
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=False,
+        ).stdout.strip()
+
+    return {"sha": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    pos = (len(values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def latency_stats(seconds: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(seconds),
+        "p50_ms": round(percentile(seconds, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(seconds, 0.99) * 1000, 2),
+        "max_ms": round(max(seconds) * 1000, 2) if seconds else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: byte
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(size: str, n_docs: int, pasal_per_doc: int, n_queries: int, concurrency: int, seed: int) -> dict:
+    """Dijalankan di proses baru (spawn): satu ukuran korpus."""
+    from ingest_jobs import InMemoryFile
+    from metrics import get_metrics
+    from rag_pipelines import ingest_documents, route_question
+
+    corpus = generate_corpus(n_docs, pasal_per_doc, seed)
+    files = [InMemoryFile(s.name, s.text.encode("utf-8")) for s in corpus]
+
+    start = time.perf_counter()
+    vectorstore, pasal_index = ingest_documents(files)
+    ingest_s = time.perf_counter() - start
+
+    pages = n_docs  # .txt = satu page per file
+    chunks = vectorstore.index.ntotal
+    queries = query_mix(corpus, n_queries, seed)
+
+    def ask(item):
+        kind, query = item
+        t0 = time.perf_counter()
+        route_question(vectorstore, pasal_index, query)
+        return kind, time.perf_counter() - t0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(ask, queries))
+    query_s = time.perf_counter() - start
+
+    by_kind: Dict[str, List[float]] = {}
+    for kind, seconds in timings:
+        by_kind.setdefault(kind, []).append(seconds)
+
+    return {
+        "size": size,
+        "documents": n_docs,
+        "pasal_per_document": pasal_per_doc,
+        "pages": pages,
+        "pasals": len(pasal_index),
+        "chunks": chunks,
+        "ingest": {
+            "seconds": round(ingest_s, 3),
+            "pages_per_sec": round(pages / ingest_s, 2),
+            "chunks_per_sec": round(chunks / ingest_s, 2),
+        },
+        "queries": {
+            "seconds": round(query_s, 3),
+            "qps": round(len(timings) / query_s, 2),
+            "concurrency": concurrency,
+            **latency_stats([s for _, s in timings]),
+            "by_kind": {k: latency_stats(v) for k, v in sorted(by_kind.items())},
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": get_metrics().summary(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium", help=f"subset dari {','.join(SIZES)}")
+    parser.add_argument("--queries", type=int, default=90, help="jumlah query per ukuran")
+    parser.add_argument("--concurrency", type=int, default=1, help="query paralel")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dim", type=int, default=384, help="dimensi embedding fake")
+    parser.add_argument("--tokens", type=int, default=48, help="token jawaban fake LLM")
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="latency buatan per teks embedding")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="latency buatan per token LLM")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override env (boleh berulang)")
+    parser.add_argument("--keep-caches", action="store_true",
+                        help="pakai CACHE_DIR yang ada (default: temp dir baru, cache kosong)")
+    parser.add_argument("--output", help="file JSON (default: benchmarks/results/<sha>.json)")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"ukuran tidak dikenal: {', '.join(unknown)}")
+
+    fake = FakeOllama(args.dim, args.tokens, args.embed_ms, args.token_ms)
+    server, base_url = start_server(fake=fake)
+
+    # default: ukur pipeline, bukan cache jawaban/embedding dari run sebelumnya
+    os.environ.update({
+        "OLLAMA_BASE_URL": base_url,
+        "EMBEDDING_PROVIDER": "ollama",
+        "OLLAMA_EMBED_MODEL": "fake-embed",
+        "OLLAMA_MODEL": "fake-chat",
+        "RESPONSE_CACHE": "0",
+        "SEMANTIC_CACHE": "0",
+    })
+    for item in args.set:
+        key, _, value = item.partition("=")
+        os.environ[key.strip()] = value
+
+    tmp = None
+    if not args.keep_caches:
+        tmp = tempfile.TemporaryDirectory(prefix="rag_bench_")
+        os.environ["CACHE_DIR"] = tmp.name
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        for size in sizes:
+            n_docs, pasal_per_doc = SIZES[size]
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                result = pool.submit(
+                    run_case, size, n_docs, pasal_per_doc, args.queries, args.concurrency, args.seed,
+                ).result()
+            results.append(result)
+            q = result["queries"]
+            print(
+                f"[{size}] ingest {result['ingest']['seconds']}s "
+                f"({result['ingest']['chunks_per_sec']} chunk/s), "
+                f"query p50 {q['p50_ms']}ms p95 {q['p95_ms']}ms p99 {q['p99_ms']}ms, "
+                f"{q['qps']} qps, peak {result['peak_rss_mb']} MB",
+                file=sys.stderr,
+            )
+    finally:
+        server.shutdown()
+        if tmp is not None:
+            tmp.cleanup()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k != "output"},
+        "env": {k: os.environ[k] for k in KNOBS if k in os.environ},
+        "results": results,
+    }
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{(commit['sha'] or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"hasil disimpan ke {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
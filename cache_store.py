@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+def cache_dir(*parts: str) -> str:
+    """
+    Root folder untuk semua cache on-disk.
+    Dikontrol via env CACHE_DIR (default: ./.rag_cache).
+    """
+    root = os.getenv("CACHE_DIR", ".rag_cache")
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class DiskLRUCache:
+    """
+    Key-value cache sederhana di atas SQLite (bytes -> bytes)
+    dengan eviction LRU berbasis jumlah entry dan TTL opsional
+    (detik sejak entry ditulis; None = tidak kedaluwarsa).
+
+    Aman dipakai lintas thread (satu koneksi + lock) dan lintas
+    proses (SQLite WAL + busy timeout).
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " created REAL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(kv)")}
+        if "created" not in columns:
+            # file cache lama (sebelum ada TTL)
+            self._conn.execute("ALTER TABLE kv ADD COLUMN created REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS kv_last_access ON kv(last_access)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, bytes] = {}
+        if not keys:
+            return found
+
+        now = time.time()
+        expired = []
+        with self._lock:
+            # batasi jumlah parameter per query (limit SQLite)
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created FROM kv WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, value, created in rows:
+                    if self._expired(created, now):
+                        expired.append(key)
+                    else:
+                        found[key] = value
+
+            if expired:
+                self._conn.executemany("DELETE FROM kv WHERE key = ?", [(k,) for k in expired])
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE kv SET last_access = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+            if found or expired:
+                self._conn.commit()
+
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, bytes]) -> None:
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, last_access, created) VALUES (?, ?, ?, ?)",
+                [(k, v, now, now) for k, v in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, key: str, value: bytes) -> None:
+        self.put_many({key: value})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def _expired(self, created: Optional[float], now: float) -> bool:
+        return self.ttl is not None and created is not None and now - created > self.ttl
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM kv WHERE key IN ("
+                " SELECT key FROM kv ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
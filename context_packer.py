@@ -0,0 +1,180 @@
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+# perkiraan kasar tokenizer LLaMA/Qwen untuk teks hukum berbahasa Indonesia
+CHARS_PER_TOKEN = 3.5
+
+# overlap teks minimal (karakter) supaya dua chunk tanpa start_index dianggap bersambung
+MIN_OVERLAP = 20
+
+# kalimat lebih pendek dari ini tidak di-dedupe ("(1)", "Pasal 5", dst.)
+MIN_SENTENCE = 40
+
+# pemisah ikut di-capture supaya format teks (baris/ayat) tetap utuh
+SENTENCE_SPLIT = re.compile(r"((?<=[.;:])\s+|\n+)")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_token_budget() -> int:
+    """
+    CONTEXT_TOKEN_BUDGET = token maksimal untuk KONTEKS di prompt (default: 1500).
+    Sesuaikan dengan num_ctx model (sisakan ruang untuk pertanyaan & jawaban).
+    """
+    return int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+
+class _Segment:
+    __slots__ = ("rank", "start", "end", "text")
+
+    def __init__(self, rank: int, start: Optional[int], text: str):
+        self.rank = rank
+        self.start = start
+        self.end = None if start is None else start + len(text)
+        self.text = text
+
+
+def _suffix_overlap(a: str, b: str) -> int:
+    """Panjang overlap terpanjang antara akhir `a` dan awal `b` (0 kalau < MIN_OVERLAP)."""
+    probe = b[:MIN_OVERLAP]
+    if len(probe) < MIN_OVERLAP:
+        return 0
+    pos = a.find(probe, max(0, len(a) - len(b)))
+    while pos != -1:
+        k = len(a) - pos
+        if b.startswith(a[pos:]):
+            return k
+        pos = a.find(probe, pos + 1)
+    return 0
+
+
+def _merge_positioned(segments: List[_Segment]) -> List[_Segment]:
+    # chunk dari page yang sama dengan start_index: gabung interval yang overlap/bersebelahan
+    segments.sort(key=lambda s: s.start)
+    out = [segments[0]]
+    for seg in segments[1:]:
+        cur = out[-1]
+        if seg.start <= cur.end + 2:
+            if seg.end > cur.end:
+                tail = seg.text[max(0, cur.end - seg.start):]
+                cur.text += tail if seg.start <= cur.end else "\n" + tail
+                cur.end = seg.end
+            cur.rank = min(cur.rank, seg.rank)
+        else:
+            out.append(seg)
+    return out
+
+
+def _merge_by_text(segments: List[_Segment]) -> List[_Segment]:
+    # tanpa start_index (index lama): gabung lewat overlap teks di ujung chunk
+    out: List[_Segment] = []
+    for seg in sorted(segments, key=lambda s: s.rank):
+        for cur in out:
+            if seg.text in cur.text:
+                break
+            if cur.text in seg.text:
+                cur.text = seg.text
+                break
+            k = _suffix_overlap(cur.text, seg.text)
+            if k:
+                cur.text += seg.text[k:]
+                break
+            k = _suffix_overlap(seg.text, cur.text)
+            if k:
+                cur.text = seg.text + cur.text[k:]
+                break
+        else:
+            out.append(seg)
+    return out
+
+
+def _dedupe_sentences(text: str, seen: set) -> str:
+    pieces = SENTENCE_SPLIT.split(text)
+    kept = []
+    # pieces = [kalimat, pemisah, kalimat, pemisah, ...]
+    for i in range(0, len(pieces), 2):
+        sentence = pieces[i]
+        sep = pieces[i + 1] if i + 1 < len(pieces) else ""
+        norm = " ".join(sentence.split()).lower()
+        if len(norm) >= MIN_SENTENCE:
+            if norm in seen:
+                continue
+            seen.add(norm)
+        kept.append(sentence + sep)
+    return "".join(kept).strip()
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # potong di akhir kalimat terakhir yang utuh kalau tidak terlalu jauh
+    end = max(cut.rfind(". "), cut.rfind(".\n"), cut.rfind(";\n"))
+    if end >= max_chars // 2:
+        return cut[:end + 1]
+    return cut.rstrip() + " …"
+
+
+def pack_context(docs: List[Document], token_budget: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Susun KONTEKS prompt dari hasil retrieval:
+
+    1. chunk dari sumber + halaman yang sama digabung (overlap 200 karakter
+       antar chunk hanya muncul sekali; pakai metadata start_index, atau
+       deteksi overlap teks untuk index lama);
+    2. segmen yang isinya sudah tercakup segmen lain dibuang, kalimat yang
+       sama persis (mis. dari dua dokumen) hanya ditulis sekali;
+    3. segmen diurutkan sesuai peringkat retrieval dan dimasukkan sampai
+       `token_budget` (default: CONTEXT_TOKEN_BUDGET); segmen terakhir
+       dipotong di batas kalimat.
+
+    Return (teks konteks, stats {chunks, segments, tokens_in, tokens_out}).
+    """
+    budget = context_token_budget() if token_budget is None else token_budget
+
+    groups: Dict[tuple, List[_Segment]] = {}
+    for rank, d in enumerate(docs):
+        meta = d.metadata
+        key = (meta.get("doc_id") or meta.get("source"), meta.get("page"))
+        start = meta.get("start_index")
+        groups.setdefault(key, []).append(_Segment(rank, start if isinstance(start, int) else None, d.page_content))
+
+    segments: List[_Segment] = []
+    for group in groups.values():
+        positioned = [s for s in group if s.start is not None]
+        other = [s for s in group if s.start is None]
+        merged = _merge_positioned(positioned) if positioned else []
+        segments.extend(_merge_by_text(merged + other) if other else merged)
+
+    segments.sort(key=lambda s: s.rank)
+
+    parts, seen, used = [], set(), 0
+    for seg in segments:
+        text = _dedupe_sentences(seg.text, seen)
+        if not text:
+            continue
+        cost = estimate_tokens(text)
+        if used + cost > budget:
+            room = budget - used
+            if room >= 64:
+                parts.append(_truncate(text, int(room * CHARS_PER_TOKEN)))
+                used = budget
+            break
+        parts.append(text)
+        used += cost
+
+    context = "\n\n".join(parts)
+    stats = {
+        "chunks": len(docs),
+        "segments": len(parts),
+        "tokens_in": sum(estimate_tokens(d.page_content) for d in docs),
+        "tokens_out": estimate_tokens(context),
+    }
+    return context, stats
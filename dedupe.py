@@ -0,0 +1,294 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+# =========================================================
+# BOILERPLATE (header / footer per page)
+# =========================================================
+
+# baris yang tidak boleh dianggap boilerplate walau berulang di tepi page
+_PROTECTED = re.compile(
+    r"(?i)^\s*(pasal\s+\d+|bab\s+[ivxlcdm]+\b|ayat\s*\(|huruf\s+\w|angka\s+\d|cukup jelas|\(\d+\))"
+)
+_DIGITS = re.compile(r"\d+")
+
+
+def _line_key(line: str) -> str:
+    # nomor halaman / tanggal berubah tiap page: angka di-mask
+    return _DIGITS.sub("#", " ".join(line.split()).lower())
+
+
+class BoilerplateStripper:
+    """
+    Buang header/footer yang berulang di page-page satu dokumen
+    ("PRESIDEN REPUBLIK INDONESIA", "- 12 -", "SALINAN", nomor lembaran, ...).
+
+    Baris di `edge_lines` baris pertama/terakhir tiap page dihitung per
+    dokumen (angka di-mask); baris yang muncul di >= `ratio` page (minimal
+    `min_pages`) dianggap boilerplate dan dibuang dari tepi semua page.
+    Heading Pasal/BAB & penanda ayat tidak pernah dibuang.
+
+    Streaming: feed() per page, finish() di akhir. Per dokumen hanya
+    `sample_pages` page pertama yang ditahan untuk belajar; page
+    berikutnya langsung dibersihkan dengan pola yang sudah dipelajari.
+    """
+
+    def __init__(self, min_pages: int = 3, ratio: float = 0.5, edge_lines: int = 3, sample_pages: int = 12):
+        self.min_pages = min_pages
+        self.ratio = ratio
+        self.edge_lines = edge_lines
+        self.sample_pages = sample_pages
+        self.lines_removed = 0
+        self._doc_key = None
+        self._sample: List[Document] = []
+        self._boiler: Optional[Set[str]] = None
+
+    def _edges(self, lines: List[str]) -> List[int]:
+        filled = [i for i, line in enumerate(lines) if line.strip()]
+        return sorted(set(filled[:self.edge_lines] + filled[-self.edge_lines:]))
+
+    def _learn(self, pages: List[Document]) -> Set[str]:
+        if len(pages) < self.min_pages:
+            return set()
+        counts: Counter = Counter()
+        for page in pages:
+            lines = (page.page_content or "").splitlines()
+            counts.update({
+                _line_key(lines[i]) for i in self._edges(lines)
+                if not _PROTECTED.match(lines[i])
+            })
+        need = max(self.min_pages, self.ratio * len(pages))
+        return {key for key, n in counts.items() if n >= need and key}
+
+    def _strip(self, page: Document) -> Document:
+        if not self._boiler:
+            return page
+        lines = (page.page_content or "").splitlines()
+        drop = {
+            i for i in self._edges(lines)
+            if _line_key(lines[i]) in self._boiler and not _PROTECTED.match(lines[i])
+        }
+        if drop:
+            self.lines_removed += len(drop)
+            page.page_content = "\n".join(line for i, line in enumerate(lines) if i not in drop)
+        return page
+
+    def _release_sample(self) -> List[Document]:
+        if self._boiler is None:
+            self._boiler = self._learn(self._sample)
+        out = [self._strip(p) for p in self._sample]
+        self._sample = []
+        return out
+
+    def feed(self, page: Document) -> List[Document]:
+        out: List[Document] = []
+        doc_key = (page.metadata.get("doc_id"), page.metadata.get("source"))
+        if doc_key != self._doc_key:
+            out.extend(self.finish())
+            self._doc_key = doc_key
+
+        if self._boiler is not None:
+            out.append(self._strip(page))
+            return out
+
+        self._sample.append(page)
+        if len(self._sample) >= self.sample_pages:
+            out.extend(self._release_sample())
+        return out
+
+    def finish(self) -> List[Document]:
+        out = self._release_sample() if self._sample else []
+        self._boiler = None
+        self._doc_key = None
+        return out
+
+    def strip_all(self, pages: Iterable[Document]) -> Iterator[Document]:
+        for page in pages:
+            yield from self.feed(page)
+        yield from self.finish()
+
+
+# =========================================================
+# CHUNK DEDUPE (exact + MinHash near-duplicate)
+# =========================================================
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+_NUMBERS = re.compile(r"\d+")
+_NUMBER_WORDS = frozenset((
+    "nol", "satu", "dua", "tiga", "empat", "lima", "enam", "tujuh", "delapan", "sembilan",
+    "sepuluh", "sebelas", "seratus", "seribu", "belas", "puluh", "ratus", "ribu", "juta",
+    "miliar", "triliun",
+))
+_PRIME = (1 << 61) - 1
+
+
+def _number_key(text: str, words: List[str]) -> tuple:
+    # angka (pidana, denda, jangka waktu, nomor pasal) + angka yang ditulis dengan huruf
+    return tuple(_NUMBERS.findall(text)) + tuple(w for w in words if w in _NUMBER_WORDS)
+
+
+def number_key(text: str) -> tuple:
+    """
+    Angka di teks (digit + angka yang ditulis dengan huruf), berurutan.
+    Teks yang mirip tapi angkanya beda (nomor UU, tahun, pidana, denda)
+    tidak boleh dianggap sama: dipakai ChunkDeduper & semantic_cache.
+    """
+    text = text.lower()
+    return _number_key(text, _WORDS.findall(text))
+
+
+class ChunkDeduper:
+    """
+    Deteksi chunk duplikat lintas dokumen.
+
+    - exact : sha1 teks ternormalisasi (lowercase, whitespace dirapikan)
+    - near  : MinHash (num_perm permutasi) atas shingle 3 kata + LSH
+              (bands x rows); kandidat diverifikasi dengan estimasi Jaccard
+              >= near_threshold DAN semua angka (digit & huruf) harus sama
+              persis: dua edisi pasal sanksi yang hanya beda "5 (lima) tahun"
+              vs "6 (enam) tahun" tetap di-embed dua-duanya.
+              Chunk pendek (< min_shingles) hanya exact.
+
+    Chunk pertama jadi kanonik dan di-embed; duplikatnya tidak di-embed,
+    referensinya (id, source, page, doc_id, pasal, bab) dicatat di
+    `references[id kanonik]` untuk ditempel ke metadata "duplicates";
+    `updated` = id kanonik yang referensinya bertambah.
+
+    Incremental ingest: seed() chunk yang sudah ada di index dulu, supaya
+    dokumen baru juga di-dedupe terhadap isi index lama.
+    """
+
+    def __init__(self, near_threshold: float = 0.9, num_perm: int = 64, bands: int = 16,
+                 min_shingles: int = 8, seed: int = 1):
+        self.near_threshold = near_threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_shingles = min_shingles
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+
+        self.references: Dict[str, List[dict]] = {}
+        self.updated: Set[str] = set()
+        self.exact = 0
+        self.near = 0
+        self._exact: Dict[str, str] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._numbers: Dict[str, tuple] = {}
+        self._buckets: Dict[tuple, List[str]] = {}
+
+    def _signature(self, words: List[str]) -> Optional[np.ndarray]:
+        shingles = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+        if len(shingles) < self.min_shingles:
+            return None
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64, count=len(shingles),
+        )
+        # (a*h + b) mod p, h < 2^32 dan a < 2^31 -> tidak overflow uint64
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def _record(self, canonical: str, chunk: Document, _id: str) -> str:
+        meta = chunk.metadata
+        ref = {"id": _id}
+        for key in ("source", "page", "doc_id", "pasal", "bab"):
+            if meta.get(key) is not None:
+                ref[key] = meta[key]
+        self.references.setdefault(canonical, []).append(ref)
+        self.updated.add(canonical)
+        return canonical
+
+    def _register(self, _id: str, sig: Optional[np.ndarray], numbers: tuple) -> None:
+        if sig is None:
+            return
+        self._signatures[_id] = sig
+        self._numbers[_id] = numbers
+        for i in range(self.bands):
+            self._buckets.setdefault((i, sig[i * self.rows:(i + 1) * self.rows].tobytes()), []).append(_id)
+
+    def _features(self, chunk: Document) -> tuple:
+        text = chunk.page_content.lower()
+        words = _WORDS.findall(text)
+        digest = hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+        return words, digest, _number_key(text, words)
+
+    def seed(self, chunk: Document, _id: str) -> None:
+        """Daftarkan chunk yang sudah ada di index sebagai kanonik (tanpa cek duplikat)."""
+        words, digest, numbers = self._features(chunk)
+        self._exact.setdefault(digest, _id)
+        if chunk.metadata.get("duplicates"):
+            self.references[_id] = list(chunk.metadata["duplicates"])
+        if self.near_threshold > 0:
+            self._register(_id, self._signature(words), numbers)
+
+    def check(self, chunk: Document, _id: str) -> Optional[str]:
+        """Return id chunk kanonik kalau `chunk` duplikat, None kalau unik (lalu didaftarkan)."""
+        words, digest, numbers = self._features(chunk)
+        canonical = self._exact.get(digest)
+        if canonical is not None:
+            self.exact += 1
+            return self._record(canonical, chunk, _id)
+        self._exact[digest] = _id
+
+        if self.near_threshold <= 0:
+            return None
+        sig = self._signature(words)
+        if sig is None:
+            return None
+
+        seen = set()
+        for i in range(self.bands):
+            for cand in self._buckets.get((i, sig[i * self.rows:(i + 1) * self.rows].tobytes()), ()):
+                if cand in seen:
+                    continue
+                seen.add(cand)
+                if self._numbers[cand] != numbers:
+                    continue
+                if float(np.mean(self._signatures[cand] == sig)) >= self.near_threshold:
+                    self.near += 1
+                    return self._record(cand, chunk, _id)
+
+        self._register(_id, sig, numbers)
+        return None
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+def get_boilerplate_stripper() -> Optional[BoilerplateStripper]:
+    """
+      BOILERPLATE_STRIP     = 1 | 0   (default: 1)
+      BOILERPLATE_MIN_RATIO = fraksi page tempat baris harus berulang (default: 0.5)
+    """
+    if os.getenv("BOILERPLATE_STRIP", "1") == "0":
+        return None
+    return BoilerplateStripper(ratio=float(os.getenv("BOILERPLATE_MIN_RATIO", "0.5")))
+
+
+def new_chunk_deduper() -> Optional[ChunkDeduper]:
+    """
+      DEDUPE_CHUNKS         = 1 | 0   (default: 1)
+      DEDUPE_NEAR_THRESHOLD = estimasi Jaccard minimal near-duplicate
+                              (default: 0.9, 0 = exact saja)
+    """
+    if os.getenv("DEDUPE_CHUNKS", "1") == "0":
+        return None
+    return ChunkDeduper(near_threshold=float(os.getenv("DEDUPE_NEAR_THRESHOLD", "0.9")))
+
+
+def dedupe_signature() -> str:
+    """Setting yang mengubah isi index, untuk index_key."""
+    return "|".join((
+        os.getenv("BOILERPLATE_STRIP", "1"),
+        os.getenv("BOILERPLATE_MIN_RATIO", "0.5"),
+        os.getenv("DEDUPE_CHUNKS", "1"),
+        os.getenv("DEDUPE_NEAR_THRESHOLD", "0.9"),
+    ))
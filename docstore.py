@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from cache_store import cache_dir
+
+
+# satu koneksi (+ lock) per file SQLite, dipakai bersama semua namespace
+_CONNECTIONS: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+
+def _connection(path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    with _CONNECTIONS_LOCK:
+        if path not in _CONNECTIONS:
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(docs)")}
+            if columns and "ns" not in columns:
+                # format lama (tanpa namespace): index yang memakainya sudah tidak valid
+                conn.execute("DROP TABLE docs")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                " ns TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " page_content TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " PRIMARY KEY (ns, id))"
+            )
+            # waktu tulis terakhir per namespace privat, untuk collect_namespaces
+            conn.execute("CREATE TABLE IF NOT EXISTS namespaces (ns TEXT PRIMARY KEY, touched REAL NOT NULL)")
+            conn.commit()
+            _CONNECTIONS[path] = (conn, threading.Lock())
+        return _CONNECTIONS[path]
+
+
+def _touch(conn: sqlite3.Connection, namespace: str) -> None:
+    if namespace:
+        conn.execute("INSERT OR REPLACE INTO namespaces (ns, touched) VALUES (?, ?)", (namespace, time.time()))
+
+
+# docstore yang masih dipakai di proses ini (namespace-nya tidak boleh dibuang)
+_LIVE: "weakref.WeakSet[SQLiteDocstore]" = weakref.WeakSet()
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    Docstore di disk (SQLite) untuk FAISS vectorstore & pasal index.
+
+    Teks + metadata chunk tidak ditahan di memori tiap sesi; FAISS hanya
+    mengambil dokumen untuk hasil top-k / fetch_k saat search.
+
+    Satu file dipakai bersama, baris dipisah per `namespace`:
+    - "" (default): baris content-addressed ("pasal:<sha256>"), boleh
+      dipakai bersama banyak index; delete() di sini no-op.
+    - namespace privat per vectorstore (new_vector_docstore / fork): id
+      chunk "<doc_id>:<n>" tidak content-addressed (isi & metadata
+      tergantung chunking, dedupe, nama file, ...), jadi tiap index punya
+      barisnya sendiri dan tidak pernah menimpa baris index lain.
+
+    Objek ini di-pickle hanya sebagai (path, namespace), aman untuk
+    save_local/pickle: index yang di-load kembali membaca namespace yang sama.
+
+    Namespace privat yang tidak lagi dipakai (build gagal / batal, index
+    tidak disimpan atau sudah diganti) dibuang oleh drop() atau
+    collect_namespaces().
+    """
+
+    def __init__(self, path: str, namespace: str = ""):
+        self.path = path
+        self.namespace = namespace
+        _LIVE.add(self)
+
+    # ----- pickle: cukup simpan path + namespace, koneksi dibuka ulang saat dipakai -----
+
+    def __getstate__(self):
+        return {"path": self.path, "namespace": self.namespace}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state.get("namespace", ""))
+
+    # ----- namespace -----
+
+    def private(self) -> "SQLiteDocstore":
+        """Docstore kosong dengan namespace baru di file yang sama."""
+        return SQLiteDocstore(self.path, uuid.uuid4().hex)
+
+    def fork(self) -> "SQLiteDocstore":
+        """Salinan semua baris namespace ini ke namespace baru (untuk clone_vectorstore)."""
+        other = self.private()
+        conn, lock = _connection(self.path)
+        with lock:
+            conn.execute(
+                "INSERT INTO docs (ns, id, page_content, metadata)"
+                " SELECT ?, id, page_content, metadata FROM docs WHERE ns = ?",
+                (other.namespace, self.namespace),
+            )
+            _touch(conn, other.namespace)
+            conn.commit()
+        return other
+
+    def drop(self) -> None:
+        """Hapus semua baris namespace privat ini (index dibuang)."""
+        if not self.namespace:
+            return None
+        conn, lock = _connection(self.path)
+        with lock:
+            conn.execute("DELETE FROM docs WHERE ns = ?", (self.namespace,))
+            conn.execute("DELETE FROM namespaces WHERE ns = ?", (self.namespace,))
+            conn.commit()
+
+    # ----- Docstore API -----
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        rows = [
+            (self.namespace, _id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str))
+            for _id, doc in texts.items()
+        ]
+        conn, lock = _connection(self.path)
+        with lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO docs (ns, id, page_content, metadata) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            _touch(conn, self.namespace)
+            conn.commit()
+
+    def search(self, search: str) -> Union[str, Document]:
+        conn, lock = _connection(self.path)
+        with lock:
+            row = conn.execute(
+                "SELECT page_content, metadata FROM docs WHERE ns = ? AND id = ?", (self.namespace, search)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def delete(self, ids: List) -> None:
+        # namespace bersama: baris yang sama mungkin masih direferensikan index lain
+        if not self.namespace:
+            return None
+        conn, lock = _connection(self.path)
+        with lock:
+            conn.executemany(
+                "DELETE FROM docs WHERE ns = ? AND id = ?", [(self.namespace, _id) for _id in ids]
+            )
+            conn.commit()
+
+    # ----- helper untuk pasal index -----
+
+    def get_text(self, _id: str) -> str:
+        conn, lock = _connection(self.path)
+        with lock:
+            row = conn.execute(
+                "SELECT page_content FROM docs WHERE ns = ? AND id = ?", (self.namespace, _id)
+            ).fetchone()
+        return row[0] if row else ""
+
+
+_DOCSTORE = None
+_DOCSTORE_LOCK = threading.Lock()
+
+
+def get_docstore() -> Optional[SQLiteDocstore]:
+    """
+    Docstore bersama (namespace "") untuk seluruh proses: teks pasal.
+
+      DOCSTORE      = sqlite | memory   (default: sqlite)
+      DOCSTORE_PATH = file SQLite       (default: CACHE_DIR/docstore.sqlite)
+
+    Return None untuk mode memory (pakai InMemoryDocstore bawaan LangChain).
+    """
+    if os.getenv("DOCSTORE", "sqlite").lower() == "memory":
+        return None
+
+    global _DOCSTORE
+    with _DOCSTORE_LOCK:
+        if _DOCSTORE is None:
+            path = os.getenv("DOCSTORE_PATH") or os.path.join(cache_dir(), "docstore.sqlite")
+            _DOCSTORE = SQLiteDocstore(path)
+        return _DOCSTORE
+
+
+def new_vector_docstore() -> Docstore:
+    """Docstore untuk FAISS vectorstore baru sesuai env DOCSTORE (namespace privat)."""
+    store = get_docstore()
+    return store.private() if store is not None else InMemoryDocstore()
+
+
+def drop_docstore(docstore: Docstore) -> None:
+    """Buang baris docstore vectorstore yang tidak jadi dipakai (no-op untuk InMemoryDocstore)."""
+    if isinstance(docstore, SQLiteDocstore):
+        docstore.drop()
+
+
+def collect_namespaces(store: SQLiteDocstore, keep: Iterable[str], grace: float) -> int:
+    """
+    Hapus namespace privat di file `store` yang:
+      - tidak ada di `keep` (namespace index yang tersimpan di disk),
+      - tidak dipakai objek docstore di proses ini, dan
+      - tidak ditulis selama `grace` detik (index yang sedang dibangun
+        proses lain, mis. batch_qa, belum tersimpan).
+    Return jumlah namespace yang dihapus.
+    """
+    keep = set(keep) | {""}
+    keep.update(d.namespace for d in list(_LIVE) if d.path == store.path)
+    cutoff = time.time() - grace
+
+    conn, lock = _connection(store.path)
+    with lock:
+        touched = dict(conn.execute("SELECT ns, touched FROM namespaces").fetchall())
+        present = {row[0] for row in conn.execute("SELECT DISTINCT ns FROM docs")}
+        stale = [
+            (ns,) for ns in present | set(touched)
+            if ns not in keep and touched.get(ns, 0.0) < cutoff
+        ]
+        conn.executemany("DELETE FROM docs WHERE ns = ?", stale)
+        conn.executemany("DELETE FROM namespaces WHERE ns = ?", stale)
+        conn.commit()
+    return len(stale)
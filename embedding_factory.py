@@ -1,4 +1,44 @@
+import hashlib
+import logging
 import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from cache_store import DiskLRUCache, cache_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_embedding_model() -> Tuple[str, str]:
+    """
+    Return (provider, model name) sesuai environment.
+    Dipakai sebagai identitas embedding (cache key, index key).
+    """
+    provider = os.getenv("EMBEDDING_PROVIDER", "ollama").lower()
+
+    if provider == "ollama":
+        return provider, os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    if provider == "hf":
+        return provider, os.getenv(
+            "HF_EMBED_MODEL",
+            "sentence-transformers/all-MiniLM-L6-v2"
+        )
+    if provider == "openai":
+        return provider, os.getenv(
+            "OPENAI_EMBED_MODEL",
+            "text-embedding-3-large"
+        )
+    return provider, ""
+
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
 
 
 def get_embeddings():
@@ -9,10 +49,23 @@ def get_embeddings():
       EMBEDDING_PROVIDER = ollama | hf | openai
 
     Default: ollama (local, ringan, stabil)
+
+    Client di-pool per (provider, model) untuk seluruh proses: koneksi HTTP
+    (keep-alive) dan model sentence-transformers tidak dibuat ulang tiap
+    rerun / sesi. Client LangChain aman dipakai bersama antar thread.
     """
+    provider, model = get_embedding_model()
+    key = (provider, model, os.getenv("OLLAMA_BASE_URL"))
 
-    provider = os.getenv("EMBEDDING_PROVIDER", "ollama").lower()
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _create_embeddings(provider, model)
+            _CLIENTS[key] = client
+        return client
 
+
+def _create_embeddings(provider: str, model: str):
     # -------------------------------------------------
     # 1) OLLAMA (LOCAL-FIRST, RECOMMENDED DEFAULT)
     # -------------------------------------------------
@@ -25,8 +78,7 @@ def get_embeddings():
                 "Install dengan: pip install langchain-ollama"
             ) from e
 
-        model = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
-        return OllamaEmbeddings(model=model)
+        return OllamaEmbeddings(model=model, base_url=os.getenv("OLLAMA_BASE_URL"))
 
     # -------------------------------------------------
     # 2) HUGGINGFACE (LOCAL / GPU / ACADEMIC)
@@ -40,10 +92,6 @@ def get_embeddings():
                 "Install dengan: pip install langchain-huggingface sentence-transformers"
             ) from e
 
-        model = os.getenv(
-            "HF_EMBED_MODEL",
-            "sentence-transformers/all-MiniLM-L6-v2"
-        )
         return HuggingFaceEmbeddings(model_name=model)
 
     # -------------------------------------------------
@@ -58,10 +106,6 @@ def get_embeddings():
                 "Install dengan: pip install langchain-openai"
             ) from e
 
-        model = os.getenv(
-            "OPENAI_EMBED_MODEL",
-            "text-embedding-3-large"
-        )
         return OpenAIEmbeddings(model=model)
 
     # -------------------------------------------------
@@ -72,3 +116,185 @@ def get_embeddings():
             f"EMBEDDING_PROVIDER tidak dikenali: '{provider}'.\n"
             "Gunakan salah satu: ollama | hf | openai"
         )
+
+
+# =========================================================
+# EMBEDDING EXECUTOR (batch + concurrency + retry)
+# =========================================================
+
+class EmbeddingExecutor(Embeddings):
+    """
+    Wrapper Embeddings yang memecah teks jadi batch berukuran tetap
+    dan menjalankan beberapa batch sekaligus (thread pool).
+
+    - ollama : N request in-flight ke server Ollama lokal
+    - hf     : N worker thread (encode sentence-transformers melepas GIL)
+
+    Batch yang gagal di-retry dengan exponential backoff.
+    Statistik run terakhir ada di `last_stats` (chunks, seconds, chunks_per_sec).
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        batch_size: int = 32,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
+        self.underlying = underlying
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.last_stats = {}
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.underlying.embed_documents(batch)
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        batches = [
+            texts[i:i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+
+        workers = min(self.max_concurrency, len(batches))
+        if workers == 1:
+            results = [self._embed_batch(b) for b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._embed_batch, batches))
+
+        vectors = [v for batch in results for v in batch]
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            "chunks": len(texts),
+            "batches": len(batches),
+            "seconds": elapsed,
+            "chunks_per_sec": len(texts) / elapsed if elapsed > 0 else float("inf"),
+        }
+        logger.info(
+            "embedded %d chunks in %d batches: %.2fs (%.1f chunks/s)",
+            len(texts), len(batches), elapsed, self.last_stats["chunks_per_sec"],
+        )
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+
+def get_embedding_executor(embeddings: Embeddings) -> EmbeddingExecutor:
+    """
+    Bungkus embeddings dengan EmbeddingExecutor sesuai environment:
+
+      EMBED_BATCH_SIZE  = teks per request / batch     (default: 32)
+      EMBED_CONCURRENCY = batch in-flight bersamaan    (default: 4, hf: 1)
+      EMBED_MAX_RETRIES = retry per batch yang gagal   (default: 3)
+    """
+    provider, _ = get_embedding_model()
+    default_concurrency = "1" if provider == "hf" else "4"
+
+    return EmbeddingExecutor(
+        embeddings,
+        batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+        max_concurrency=int(os.getenv("EMBED_CONCURRENCY", default_concurrency)),
+        max_retries=int(os.getenv("EMBED_MAX_RETRIES", "3")),
+    )
+
+
+# =========================================================
+# EMBEDDING CACHE (content-addressed, on-disk, LRU)
+# =========================================================
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrapper Embeddings yang menyimpan vektor chunk ke disk.
+    Key = sha256(provider, model, teks chunk), jadi chunk yang
+    pernah di-embed tidak dikirim ulang ke provider.
+
+    Query (embed_query) tidak di-cache: satu teks, murah, dan
+    jarang berulang persis.
+    """
+
+    def __init__(self, underlying: Embeddings, namespace: str, cache: DiskLRUCache):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.cache = cache
+
+    def _key(self, text: str) -> str:
+        h = hashlib.sha256()
+        h.update(self.namespace.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        found = self.cache.get_many(keys)
+
+        # embed hanya teks unik yang belum ada di cache
+        missing = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = t
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = {
+                k: array("f", v).tobytes()
+                for k, v in zip(missing.keys(), vectors)
+            }
+            self.cache.put_many(fresh)
+            found.update(fresh)
+
+        out = []
+        for k in keys:
+            vec = array("f")
+            vec.frombytes(found[k])
+            out.append(vec.tolist())
+        return out
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+
+_EMBED_CACHE = None
+_EMBED_CACHE_LOCK = threading.Lock()
+
+
+def get_cached_embeddings() -> Embeddings:
+    """
+    Sama seperti get_embeddings(), tapi dibungkus EmbeddingExecutor
+    (batch + concurrency) lalu CachedEmbeddings, jadi hanya chunk yang
+    belum ada di cache yang dikirim ke provider.
+
+      EMBED_CACHE             = 1 | 0      (default: 1)
+      EMBED_CACHE_MAX_ENTRIES = int        (default: 200000)
+    """
+    embeddings = get_embedding_executor(get_embeddings())
+    if os.getenv("EMBED_CACHE", "1") == "0":
+        return embeddings
+
+    global _EMBED_CACHE
+    with _EMBED_CACHE_LOCK:
+        if _EMBED_CACHE is None:
+            _EMBED_CACHE = DiskLRUCache(
+                os.path.join(cache_dir(), "embeddings.sqlite"),
+                max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000")),
+            )
+
+    provider, model = get_embedding_model()
+    return CachedEmbeddings(embeddings, f"{provider}:{model}", _EMBED_CACHE)
@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_index_bytes(vectorstore, pasal_index) -> int:
+    """
+    Perkiraan kasar memori satu index: kode vektor FAISS + teks docstore
+    (kalau masih in-memory) + overhead record pasal.
+    """
+    index = vectorstore.index
+    per_vector = getattr(index, "code_size", 0) or index.d * 4
+    total = index.ntotal * per_vector
+
+    docstore = vectorstore.docstore
+    if isinstance(docstore, InMemoryDocstore):
+        total += sum(len(d.page_content) for d in docstore._dict.values())
+
+    total += len(vectorstore.index_to_docstore_id) * 100
+    total += len(pasal_index) * 300
+    return total
+
+
+class _Entry:
+    __slots__ = ("vectorstore", "pasal_index", "refs", "last_used", "nbytes")
+
+    def __init__(self, vectorstore, pasal_index):
+        self.vectorstore = vectorstore
+        self.pasal_index = pasal_index
+        self.refs = 0
+        self.last_used = time.time()
+        self.nbytes = estimate_index_bytes(vectorstore, pasal_index)
+
+
+class IndexLease:
+    """
+    Referensi satu sesi ke index bersama. release() idempotent; kalau sesi
+    hilang tanpa release (tab ditutup), lease di-release saat di-GC.
+    """
+
+    def __init__(self, registry: "IndexRegistry", key: str, entry: _Entry):
+        self.key = key
+        self.vectorstore = entry.vectorstore
+        self.pasal_index = entry.pasal_index
+        self._finalizer = weakref.finalize(self, registry.release, key)
+
+    def release(self) -> None:
+        self._finalizer()
+
+
+class IndexRegistry:
+    """
+    Registry index (vectorstore + pasal_index) untuk seluruh proses,
+    key = index_key (hash isi dokumen + embedding model).
+
+    - Upload identik di banyak sesi memakai satu objek index yang sama.
+    - Build untuk key yang sama tidak pernah jalan dua kali bersamaan.
+    - Index tanpa lease aktif di-evict (LRU) kalau total perkiraan memori
+      melewati budget INDEX_REGISTRY_MAX_MB (default: 2048). Index yang
+      masih dipakai sesi tidak pernah di-evict.
+
+    Index bersama diperlakukan read-only; perubahan (incremental) dilakukan
+    pada salinan yang didaftarkan dengan key baru.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def acquire(self, key: str, factory: Callable[[], Tuple[object, object]]) -> Tuple[IndexLease, bool]:
+        """
+        Ambil lease untuk `key`; kalau belum ada, panggil factory() untuk
+        load/build (sesi lain dengan key sama menunggu hasil yang sama).
+        Return (lease, created) — created=False berarti index sudah ada.
+        """
+        lease = self._lease_existing(key)
+        if lease is not None:
+            return lease, False
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            lease = self._lease_existing(key)
+            if lease is not None:
+                return lease, False
+
+            vectorstore, pasal_index = factory()
+            entry = _Entry(vectorstore, pasal_index)
+            with self._lock:
+                self._entries[key] = entry
+                self._build_locks.pop(key, None)
+                lease = self._new_lease(key, entry)
+                self._evict()
+            return lease, True
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+                entry.last_used = time.time()
+            self._evict()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "indexes": len(self._entries),
+                "referenced": sum(1 for e in self._entries.values() if e.refs),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _lease_existing(self, key: str) -> Optional[IndexLease]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return self._new_lease(key, entry)
+
+    def _new_lease(self, key: str, entry: _Entry) -> IndexLease:
+        entry.refs += 1
+        entry.last_used = time.time()
+        return IndexLease(self, key, entry)
+
+    def _evict(self) -> None:
+        total = sum(e.nbytes for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+
+        idle = sorted(
+            (k for k, e in self._entries.items() if e.refs == 0),
+            key=lambda k: self._entries[k].last_used,
+        )
+        for key in idle:
+            if total <= self.max_bytes:
+                break
+            total -= self._entries.pop(key).nbytes
+            logger.info("index %s di-evict dari registry", key[:12])
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_index_registry() -> IndexRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            max_mb = float(os.getenv("INDEX_REGISTRY_MAX_MB", "2048"))
+            _REGISTRY = IndexRegistry(int(max_mb * 1024 * 1024))
+        return _REGISTRY
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+
+from cache_store import cache_dir
+from docstore import SQLiteDocstore, collect_namespaces, get_docstore
+from dedupe import dedupe_signature
+from embedding_factory import get_cached_embeddings, get_embedding_model
+from pdf_extract import pdf_backend
+from vector_index import apply_search_params, index_signature
+
+
+# Naikkan kalau format index / chunking berubah supaya index lama tidak dipakai.
+INDEX_FORMAT_VERSION = "9"
+
+PASAL_INDEX_FILE = "pasal_index.pkl"
+# namespace SQLiteDocstore milik index (lihat collect_docstore)
+DOCSTORE_NS_FILE = "docstore.ns"
+
+
+def chunk_params() -> Tuple[int, int]:
+    """
+    CHUNK_SIZE / CHUNK_OVERLAP untuk splitter (default: 900 / 200).
+    Ikut masuk index_key: chunking berbeda = index berbeda.
+    """
+    return int(os.getenv("CHUNK_SIZE", "900")), int(os.getenv("CHUNK_OVERLAP", "200"))
+
+
+def chunking_mode() -> str:
+    """
+    CHUNKING = legal | recursive   (default: legal)
+
+    legal     : chunk mengikuti batas BAB/Pasal/ayat (lihat rag_pipelines)
+    recursive : RecursiveCharacterTextSplitter per page
+    """
+    mode = os.getenv("CHUNKING", "legal").lower()
+    if mode not in ("legal", "recursive"):
+        raise ValueError(
+            f"CHUNKING tidak dikenali: '{mode}'.\n"
+            "Gunakan salah satu: legal | recursive"
+        )
+    return mode
+
+
+def file_digest(f) -> str:
+    """
+    sha256 isi file upload (UploadedFile Streamlit / apapun yang punya getbuffer()).
+    """
+    return hashlib.sha256(f.getbuffer()).hexdigest()
+
+
+def index_key(files) -> str:
+    """
+    Key index = hash dari (versi format, embedding model, chunking, setting
+    dedupe, backend PDF, tipe + parameter build FAISS, nama + isi tiap
+    file). Urutan upload tidak mempengaruhi key.
+    """
+    provider, model = get_embedding_model()
+    size, overlap = chunk_params()
+    h = hashlib.sha256()
+    h.update(
+        f"{INDEX_FORMAT_VERSION}|{provider}:{model}|{chunking_mode()}:{size}/{overlap}"
+        f"|{dedupe_signature()}|pdf:{pdf_backend()}|faiss:{index_signature()}".encode("utf-8")
+    )
+
+    for name, digest in sorted((os.path.basename(f.name), file_digest(f)) for f in files):
+        h.update(b"\0")
+        h.update(name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(digest.encode("ascii"))
+
+    return h.hexdigest()
+
+
+def _index_path(key: str) -> str:
+    return os.path.join(cache_dir("indexes"), key)
+
+
+def save_index(key: str, vectorstore: FAISS, pasal_index) -> str:
+    """
+    Simpan FAISS index + pasal_index ke CACHE_DIR/indexes/<key>.
+    Ditulis ke folder sementara dulu lalu di-rename (atomic). Setelah itu
+    baris docstore milik index yang tidak tersimpan / sudah diganti dibuang
+    (collect_docstore).
+    """
+    final_path = _index_path(key)
+    tmp_path = tempfile.mkdtemp(prefix=f".{key[:12]}_", dir=os.path.dirname(final_path))
+
+    try:
+        vectorstore.save_local(tmp_path)
+        with open(os.path.join(tmp_path, PASAL_INDEX_FILE), "wb") as out:
+            pickle.dump(pasal_index, out, protocol=pickle.HIGHEST_PROTOCOL)
+        if isinstance(vectorstore.docstore, SQLiteDocstore):
+            with open(os.path.join(tmp_path, DOCSTORE_NS_FILE), "w", encoding="ascii") as out:
+                out.write(vectorstore.docstore.namespace)
+
+        if os.path.isdir(final_path):
+            shutil.rmtree(final_path)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    collect_docstore()
+    return final_path
+
+
+def collect_docstore() -> int:
+    """
+    Buang namespace docstore yang tidak direferensikan index mana pun di
+    CACHE_DIR/indexes (build gagal / batal, index tidak disimpan atau
+    sudah diganti), kecuali yang masih dipakai di proses ini atau baru
+    ditulis (index yang sedang dibangun proses lain):
+
+      DOCSTORE_GC_GRACE = detik sejak tulis terakhir   (default: 3600)
+
+    Return jumlah namespace yang dihapus.
+    """
+    store = get_docstore()
+    if store is None:
+        return 0
+
+    root = cache_dir("indexes")
+    keep = set()
+    for name in os.listdir(root):
+        try:
+            with open(os.path.join(root, name, DOCSTORE_NS_FILE), encoding="ascii") as fh:
+                keep.add(fh.read().strip())
+        except OSError:
+            continue
+    return collect_namespaces(store, keep, grace=float(os.getenv("DOCSTORE_GC_GRACE", "3600")))
+
+
+def load_index(key: str) -> Optional[Tuple[FAISS, object]]:
+    """
+    Load (vectorstore, pasal_index) kalau key sudah pernah disimpan.
+    Return None kalau belum ada / rusak.
+    """
+    path = _index_path(key)
+    pasal_path = os.path.join(path, PASAL_INDEX_FILE)
+    if not os.path.isfile(pasal_path):
+        return None
+
+    try:
+        # file pickle di sini hanya ditulis oleh save_index (lokal, bukan input user)
+        vectorstore = FAISS.load_local(
+            path,
+            get_cached_embeddings(),
+            allow_dangerous_deserialization=True,
+        )
+        with open(pasal_path, "rb") as fh:
+            pasal_index = pickle.load(fh)
+    except Exception:
+        return None
+
+    apply_search_params(vectorstore.index)
+
+    return vectorstore, pasal_index
@@ -0,0 +1,188 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from index_registry import IndexLease, IndexRegistry, get_index_registry
+from index_store import file_digest, load_index, save_index
+from docstore import drop_docstore
+from rag_pipelines import copy_index, ingest_documents, remove_documents
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngestCancelled(Exception):
+    pass
+
+
+class InMemoryFile:
+    """
+    Snapshot file upload (nama + bytes). UploadedFile Streamlit tidak aman
+    dibaca dari thread lain selama script rerun, jadi job memakai salinan ini.
+    """
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.size = len(data)
+        self._data = data
+
+    @classmethod
+    def from_upload(cls, f) -> "InMemoryFile":
+        return cls(f.name, bytes(f.getbuffer()))
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._data)
+
+
+class IngestJob:
+    """
+    Satu ingest (load -> pasal index -> embedding -> simpan) yang jalan di
+    worker IngestQueue. State: queued | running | done | failed | cancelled.
+
+    - stage / progress diperbarui dari callback on_progress ingest_documents
+      (pages, done/total chunk) dan boleh dibaca UI kapan saja.
+    - pasal_index terisi begitu tahap pasal index selesai, sebelum embedding
+      selesai; vectorstore adalah index lama (incremental) atau None.
+    - cancel() berlaku di titik progress berikutnya.
+
+    Kalau `base` (vectorstore, pasal_index, doc_ids) diberikan dan key belum
+    ada di cache, dokumen di-update incremental pada salinan base.
+    """
+
+    def __init__(self, key: str, files: List[InMemoryFile], base: Optional[tuple] = None):
+        self.key = key
+        self.files = files
+        self.base = base
+        self.state = "queued"
+        self.stage = "queued"
+        self.progress: Dict[str, object] = {}
+        self.vectorstore = base[0] if base else None
+        self.pasal_index = None
+        self.lease: Optional[IndexLease] = None
+        self.created = False
+        self.status_text: Optional[str] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def on_progress(self, stage: str, **info) -> None:
+        if self._cancel.is_set():
+            raise IngestCancelled()
+        self.stage = stage
+        if stage == "pasal_index":
+            self.pasal_index = info["pasal_index"]
+        else:
+            self.progress.update(info)
+
+    def run(self, registry: IndexRegistry) -> None:
+        if self._cancel.is_set():
+            self.state = "cancelled"
+            return
+
+        self.state = "running"
+        self.started_at = time.time()
+        try:
+            self.lease, self.created = registry.acquire(self.key, self._open_index)
+            self.state = "done"
+        except IngestCancelled:
+            self.state = "cancelled"
+        except Exception as e:
+            logger.exception("ingest %s gagal", self.key[:12])
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self.finished_at = time.time()
+
+    def _open_index(self):
+        # dipanggil registry hanya kalau index belum aktif di proses ini
+        self.on_progress("loading", pages=0)
+        cached = load_index(self.key)
+        if cached is not None:
+            self.status_text = "Index ditemukan di cache. Dokumen siap dipakai."
+            return cached
+
+        current = {file_digest(f): f for f in self.files}
+        if self.base is not None:
+            # incremental, pada salinan: index lama mungkin dipakai sesi lain
+            base_vs, base_pi, previous = self.base
+            added = [f for d, f in current.items() if d not in previous]
+            removed = [d for d in previous if d not in current]
+            vectorstore, pasal_index = copy_index(base_vs, base_pi)
+            try:
+                if removed:
+                    remove_documents(vectorstore, pasal_index, removed, [d for d in previous if d not in removed])
+                if added:
+                    vectorstore, pasal_index = ingest_documents(added, vectorstore, pasal_index, self.on_progress)
+            except BaseException:
+                # batal / gagal: salinan docstore tidak akan pernah dipakai
+                drop_docstore(vectorstore.docstore)
+                raise
+            self.status_text = f"Index diperbarui (incremental: +{len(added)} / -{len(removed)} dokumen)."
+        else:
+            vectorstore, pasal_index = ingest_documents(self.files, on_progress=self.on_progress)
+            if vectorstore is None:
+                raise ValueError("Tidak ada teks yang bisa diindeks dari dokumen.")
+            self.status_text = "Document uploaded and processed successfully."
+
+        self.on_progress("saving")
+        save_index(self.key, vectorstore, pasal_index)
+        return vectorstore, pasal_index
+
+
+class IngestQueue:
+    """
+    Antrian job ingest dengan worker thread di background.
+
+      INGEST_WORKERS = jumlah job yang boleh jalan bersamaan (default: 1)
+
+    Satu worker cukup untuk kebanyakan kasus: embedding sudah paralel di
+    dalam satu job (EMBED_CONCURRENCY), job tambahan hanya berebut model.
+    """
+
+    def __init__(self, workers: int = 1, registry: Optional[IndexRegistry] = None):
+        self.registry = registry or get_index_registry()
+        self._queue: "queue.Queue[IngestJob]" = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"ingest-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, job: IngestJob) -> IngestJob:
+        self._queue.put(job)
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                job.run(self.registry)
+            finally:
+                self._queue.task_done()
+
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_ingest_queue() -> IngestQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = IngestQueue(int(os.getenv("INGEST_WORKERS", "1")))
+        return _QUEUE
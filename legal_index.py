@@ -0,0 +1,455 @@
+import bisect
+import hashlib
+import math
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+SANCTION_KEYWORDS = [
+    "sanksi", "denda", "pidana", "penjara",
+    "kurungan", "administratif", "ganti rugi"
+]
+
+# bobot tambahan per keyword sanksi yang ada di query & pasal
+SANCTION_BOOST = 10.0
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+QUERY_TOKEN_PATTERN = re.compile(r"\b[a-zA-Z]{4,}\b")
+
+_PREFIXES = ("di", "ter")
+_SUFFIXES = ("nya", "lah", "kah")
+_PHRASES = {tuple(k.split()): k for k in SANCTION_KEYWORDS if " " in k}
+
+
+def _stem(token: str) -> str:
+    """
+    Stemming ringan: buang partikel/posesif (-nya, -lah, -kah)
+    dan prefix pasif (di-, ter-), misal "dipidana" -> "pidana".
+    """
+    for suf in _SUFFIXES:
+        if token.endswith(suf) and len(token) - len(suf) >= 4:
+            token = token[:-len(suf)]
+            break
+    for pre in _PREFIXES:
+        if token.startswith(pre) and len(token) - len(pre) >= 4:
+            token = token[len(pre):]
+            break
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase + tokenisasi alfanumerik + stemming ringan.
+    Keyword frasa (mis. "ganti rugi") ikut di-emit sebagai satu token.
+    """
+    raw = TOKEN_PATTERN.findall(text.lower())
+    tokens = [_stem(t) for t in raw]
+
+    for i in range(len(raw) - 1):
+        phrase = _PHRASES.get((raw[i], raw[i + 1]))
+        if phrase:
+            tokens.append(phrase)
+
+    return tokens
+
+
+HEADING_PATTERN = re.compile(
+    r"(?im)^[ \t]*(?:(Pasal\s+(\d+))|(BAB\s+([IVXLCDM]+)))[ \t]*$"
+)
+AYAT_PATTERN = re.compile(r"(?m)^\s*\((\d+)\)")
+
+
+class Pasal:
+    """
+    Satu pasal. Pakai __slots__ (bukan dict) supaya ringan untuk
+    statuta dengan ribuan pasal.
+
+    ayat = tuple (nomor ayat, offset awal di content)
+
+    Setelah detach(store), teks pasal hanya ada di docstore (disk) dan
+    `content` diambil saat dibutuhkan (render / ayat).
+    """
+
+    __slots__ = ("number", "label", "source", "page", "doc_id", "bab", "ayat", "_content", "_store")
+
+    def __init__(self, number: int, label: str, content: str, source: str,
+                 page: Optional[int], doc_id: Optional[str], bab: Optional[str]):
+        self.number = number
+        self.label = label
+        self._content = content
+        self._store = None
+        self.source = source
+        self.page = page
+        self.doc_id = doc_id
+        self.bab = bab
+        self.ayat = tuple((int(m.group(1)), m.start()) for m in AYAT_PATTERN.finditer(content))
+
+    @property
+    def content(self) -> str:
+        if self._store is None:
+            return self._content
+        return self._store.get_text(self._content)
+
+    def detach(self, store) -> None:
+        """Pindahkan teks ke docstore; yang tersisa di memori hanya key-nya."""
+        if self._store is not None:
+            return
+        key = "pasal:" + hashlib.sha256(self._content.encode("utf-8")).hexdigest()
+        store.add({key: Document(page_content=self._content)})
+        self._content = key
+        self._store = store
+
+    def ayat_text(self, number: int) -> Optional[str]:
+        for i, (no, start) in enumerate(self.ayat):
+            if no == number:
+                content = self.content
+                end = self.ayat[i + 1][1] if i + 1 < len(self.ayat) else len(content)
+                return content[start:end].strip()
+        return None
+
+    def __repr__(self) -> str:
+        return f"Pasal({self.label!r}, bab={self.bab!r}, source={self.source!r}, page={self.page!r})"
+
+
+class PasalExtractor:
+    """
+    Extract Pasal (+ BAB induknya) dari page yang masuk berurutan.
+
+    Teks page dari dokumen yang sama disambung, jadi pasal yang
+    terpotong page break tetap utuh. Bisa dipakai streaming:
+    feed() per page, finish() di akhir; yang ditahan hanya teks
+    sejak heading terakhir.
+    """
+
+    def __init__(self):
+        self._doc_key = None
+        self._source = "unknown"
+        self._doc_id = None
+        self._buf = ""
+        self._pages: List[Tuple[int, Optional[int]]] = []  # (offset di buf, page)
+        self._bab: Optional[str] = None
+        self._open: Optional[Tuple[int, str, int, Optional[int]]] = None  # (no, label, start, page)
+
+    def _page_at(self, offset: int) -> Optional[int]:
+        i = bisect.bisect_right([o for o, _ in self._pages], offset) - 1
+        return self._pages[max(i, 0)][1] if self._pages else None
+
+    def _close(self, end: int) -> List[Pasal]:
+        if self._open is None:
+            return []
+        no, label, start, page = self._open
+        self._open = None
+        body = self._buf[start:end].strip()
+        if not body:
+            return []
+        return [Pasal(no, label, body, self._source, page, self._doc_id, self._bab)]
+
+    def feed(self, page) -> List[Pasal]:
+        out: List[Pasal] = []
+        meta = page.metadata
+        doc_key = (meta.get("doc_id"), meta.get("source", "unknown"))
+        if doc_key != self._doc_key:
+            out.extend(self.finish())
+            self._doc_key = doc_key
+            self._doc_id, self._source = doc_key
+
+        scan_from = len(self._buf)
+        self._buf += "\n" + (page.page_content or "")
+        self._pages.append((scan_from, meta.get("page", None)))
+
+        for m in HEADING_PATTERN.finditer(self._buf, scan_from):
+            out.extend(self._close(m.start()))
+            if m.group(1):
+                self._open = (int(m.group(2)), m.group(1).strip(), m.end(), self._page_at(m.start()))
+            else:
+                self._bab = " ".join(m.group(3).split()).upper()
+
+        # buang teks sebelum pasal yang masih terbuka (sudah tidak dibutuhkan)
+        keep_from = self._open[2] if self._open else len(self._buf)
+        if keep_from > 0:
+            first_page = self._page_at(keep_from)
+            self._pages = [(0, first_page)] + [
+                (o - keep_from, p) for o, p in self._pages if o > keep_from
+            ]
+            self._buf = self._buf[keep_from:]
+            if self._open:
+                no, label, _, pg = self._open
+                self._open = (no, label, 0, pg)
+
+        return out
+
+    def finish(self) -> List[Pasal]:
+        out = self._close(len(self._buf))
+        self._buf = ""
+        self._pages = []
+        self._bab = None
+        self._doc_key = None
+        return out
+
+
+class SectionSplitter:
+    """
+    Potong page yang masuk berurutan jadi section struktural per dokumen
+    (Document, untuk chunking):
+
+      section = "text"  : teks sebelum heading pertama (judul, menimbang, ...)
+                "bab"   : heading BAB + judulnya
+                "pasal" : satu pasal lengkap, termasuk baris "Pasal N"
+
+    Seperti PasalExtractor: streaming, pasal yang terpotong page break tetap
+    utuh, yang ditahan hanya section terakhir. Section yang lebih panjang
+    dari `max_chars` (dokumen tanpa struktur pasal) dipotong di baris.
+    """
+
+    def __init__(self, max_chars: int = 20000):
+        self.max_chars = max_chars
+        self._doc_key = None
+        self._buf = ""
+        self._pages: List[Tuple[int, Optional[int]]] = []  # (offset di buf, page)
+        self._bab: Optional[str] = None
+        self._kind = "text"
+        self._number: Optional[int] = None
+
+    def _page_at(self, offset: int) -> Optional[int]:
+        i = bisect.bisect_right([o for o, _ in self._pages], offset) - 1
+        return self._pages[max(i, 0)][1] if self._pages else None
+
+    def _emit(self, end: int) -> List[Document]:
+        text = self._buf[:end].strip()
+        out = []
+        if text:
+            doc_id, source = self._doc_key
+            meta = {"source": source, "doc_id": doc_id, "page": self._page_at(0), "section": self._kind}
+            if self._bab:
+                meta["bab"] = self._bab
+            if self._kind == "pasal":
+                meta["pasal"] = self._number
+            out.append(Document(page_content=text, metadata=meta))
+
+        first_page = self._page_at(end)
+        self._pages = [(0, first_page)] + [(o - end, p) for o, p in self._pages if o > end]
+        self._buf = self._buf[end:]
+        return out
+
+    def feed(self, page) -> List[Document]:
+        out: List[Document] = []
+        meta = page.metadata
+        doc_key = (meta.get("doc_id"), meta.get("source", "unknown"))
+        if doc_key != self._doc_key:
+            out.extend(self.finish())
+            self._doc_key = doc_key
+
+        scan_from = len(self._buf)
+        self._buf += "\n" + (page.page_content or "")
+        self._pages.append((scan_from, meta.get("page", None)))
+
+        shift = 0
+        for m in list(HEADING_PATTERN.finditer(self._buf, scan_from)):
+            out.extend(self._emit(m.start() - shift))
+            shift = m.start()
+            if m.group(1):
+                self._kind, self._number = "pasal", int(m.group(2))
+            else:
+                self._kind, self._number = "bab", None
+                self._bab = " ".join(m.group(3).split()).upper()
+
+        while len(self._buf) > self.max_chars:
+            cut = self._buf.rfind("\n", 1, self.max_chars)
+            out.extend(self._emit(cut if cut > 0 else self.max_chars))
+
+        return out
+
+    def finish(self) -> List[Document]:
+        out = self._emit(len(self._buf)) if self._doc_key is not None else []
+        self._buf = ""
+        self._pages = []
+        self._bab = None
+        self._kind = "text"
+        self._number = None
+        self._doc_key = None
+        return out
+
+
+class PasalIndex:
+    """
+    Index terstruktur semua pasal: per dokumen BAB -> Pasal -> ayat,
+    plus inverted index BM25 untuk pencarian teks.
+
+    Kalau `store` (docstore disk) diberikan, teks pasal dipindah ke sana
+    setelah di-tokenize; index hanya menyimpan struktur + postings.
+
+    - by number : nomor pasal -> [pasal id]          (lookup O(1))
+    - by bab    : "BAB III"   -> [pasal id]          (lookup O(1))
+    - documents : doc_id -> {BAB -> [pasal id]}      (outline per dokumen)
+    - postings  : term -> {pasal id: term frequency}
+    - doc_len   : pasal id -> jumlah token
+    Query BM25 hanya menyentuh postings dari term di query, bukan seluruh korpus.
+    """
+
+    def __init__(self, pasals: Iterable[Pasal] = (), k1: float = 1.5, b: float = 0.75, store=None):
+        self.k1 = k1
+        self.b = b
+        self.store = store
+        self._pasals: Dict[int, Pasal] = {}
+        self._by_number: Dict[int, List[int]] = {}
+        self._by_bab: Dict[str, List[int]] = {}
+        self._documents: Dict[Optional[str], Dict[Optional[str], List[int]]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._next_id = 0
+        self.extend(pasals)
+
+    # ----- collection -----
+
+    def __iter__(self) -> Iterator[Pasal]:
+        return iter(self._pasals.values())
+
+    def __len__(self) -> int:
+        return len(self._pasals)
+
+    def extend(self, pasals: Iterable[Pasal]) -> None:
+        for p in pasals:
+            pid = self._next_id
+            self._next_id += 1
+            self._pasals[pid] = p
+
+            self._by_number.setdefault(p.number, []).append(pid)
+            if p.bab:
+                self._by_bab.setdefault(p.bab, []).append(pid)
+            self._documents.setdefault(p.doc_id, {}).setdefault(p.bab, []).append(pid)
+
+            tf: Dict[str, int] = {}
+            tokens = tokenize(p.content)
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+            for t, n in tf.items():
+                self._postings.setdefault(t, {})[pid] = n
+
+            self._doc_len[pid] = len(tokens)
+            self._total_len += len(tokens)
+
+            if self.store is not None:
+                p.detach(self.store)
+
+    def remove_docs(self, doc_ids: Iterable[str]) -> None:
+        stale = set()
+        for doc_id in doc_ids:
+            for pids in self._documents.pop(doc_id, {}).values():
+                stale.update(pids)
+        if not stale:
+            return
+
+        terms = set()
+        for pid in stale:
+            p = self._pasals.pop(pid)
+            self._total_len -= self._doc_len.pop(pid)
+            terms.update(tokenize(p.content))
+            _discard(self._by_number, p.number, pid)
+            if p.bab:
+                _discard(self._by_bab, p.bab, pid)
+
+        for t in terms:
+            postings = self._postings.get(t)
+            if postings is None:
+                continue
+            for pid in stale.intersection(postings):
+                del postings[pid]
+            if not postings:
+                del self._postings[t]
+
+    def copy(self) -> "PasalIndex":
+        """
+        Salinan struktur index (record Pasal dipakai bersama, tidak disalin),
+        untuk diubah tanpa mempengaruhi index asal.
+        """
+        other = PasalIndex(k1=self.k1, b=self.b, store=self.store)
+        other._pasals = dict(self._pasals)
+        other._by_number = {k: list(v) for k, v in self._by_number.items()}
+        other._by_bab = {k: list(v) for k, v in self._by_bab.items()}
+        other._documents = {
+            doc: {bab: list(pids) for bab, pids in babs.items()}
+            for doc, babs in self._documents.items()
+        }
+        other._postings = {t: dict(p) for t, p in self._postings.items()}
+        other._doc_len = dict(self._doc_len)
+        other._total_len = self._total_len
+        other._next_id = self._next_id
+        return other
+
+    # ----- structured lookup -----
+
+    def get_pasal(self, number: int, doc_id: Optional[str] = None) -> List[Pasal]:
+        pasals = [self._pasals[pid] for pid in self._by_number.get(number, ())]
+        if doc_id is not None:
+            pasals = [p for p in pasals if p.doc_id == doc_id]
+        return pasals
+
+    def get_bab(self, bab: str) -> List[Pasal]:
+        key = " ".join(bab.split()).upper()
+        if not key.startswith("BAB "):
+            key = f"BAB {key}"
+        return [self._pasals[pid] for pid in self._by_bab.get(key, ())]
+
+    def outline(self, doc_id: Optional[str]) -> Dict[Optional[str], List[str]]:
+        """
+        Struktur satu dokumen: {BAB -> [label pasal]} sesuai urutan di dokumen.
+        """
+        return {
+            bab: [self._pasals[pid].label for pid in pids]
+            for bab, pids in self._documents.get(doc_id, {}).items()
+        }
+
+    # ----- ranking -----
+
+    def _query_terms(self, query: str) -> List[str]:
+        q = query.lower()
+        terms = [_stem(t) for t in QUERY_TOKEN_PATTERN.findall(q)]
+        terms += [k for k in SANCTION_KEYWORDS if " " in k and k in q]
+        return list(dict.fromkeys(terms))
+
+    def search(self, query: str, top_k: int = 3) -> List[Pasal]:
+        """
+        Ranking BM25 + boost keyword sanksi.
+        Return pasal dengan skor > 0, urut skor tertinggi.
+        """
+        n_docs = len(self._pasals)
+        if not n_docs:
+            return []
+
+        avg_len = self._total_len / n_docs or 1.0
+        q = query.lower()
+        scores: Dict[int, float] = {}
+
+        for term in self._query_terms(query):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for pid, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[pid] / avg_len)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        for k in SANCTION_KEYWORDS:
+            if k in q:
+                for pid in self._postings.get(k, ()):
+                    scores[pid] = scores.get(pid, 0.0) + SANCTION_BOOST
+
+        ranked = sorted(
+            (pid for pid, s in scores.items() if s > 0),
+            key=lambda pid: (-scores[pid], pid),
+        )
+        return [self._pasals[pid] for pid in ranked[:top_k]]
+
+
+def _discard(table: Dict, key, pid: int) -> None:
+    pids = table.get(key)
+    if pids is None:
+        return
+    pids.remove(pid)
+    if not pids:
+        del table[key]
@@ -0,0 +1,43 @@
+import os
+import threading
+from typing import Optional
+
+from langchain_ollama import ChatOllama
+
+
+DEFAULT_OLLAMA_MODEL = "llama3.2:3b"
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_llm_model() -> str:
+    return os.getenv("OLLAMA_MODEL", DEFAULT_OLLAMA_MODEL)
+
+
+def get_llm(temperature: float = 0.3, model: Optional[str] = None) -> ChatOllama:
+    """
+    ChatOllama yang di-pool per (model, temperature, base URL) untuk seluruh
+    proses, jadi koneksi HTTP keep-alive ke server Ollama dipakai ulang
+    antar pertanyaan, rerun, dan sesi. Aman dipakai bersama antar thread.
+
+      OLLAMA_MODEL      = nama model   (default: llama3.2:3b)
+      OLLAMA_BASE_URL   = URL server   (default: bawaan client ollama)
+      OLLAMA_KEEP_ALIVE = berapa lama model tetap di memori setelah request
+                          (default: 30m, lihat warmup.py)
+    """
+    model = model or get_llm_model()
+    base_url = os.getenv("OLLAMA_BASE_URL")
+    key = (model, float(temperature), base_url)
+
+    with _CLIENTS_LOCK:
+        llm = _CLIENTS.get(key)
+        if llm is None:
+            llm = ChatOllama(
+                model=model,
+                temperature=temperature,
+                base_url=base_url,
+                keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+            )
+            _CLIENTS[key] = llm
+        return llm
@@ -0,0 +1,200 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+logger = logging.getLogger("rag.metrics")
+
+# batas bucket histogram (detik), dari lookup cache (ms) sampai ingest besar
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "recent")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        # sampel terakhir untuk p50/p95 di debug panel
+        self.recent = deque(maxlen=512)
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+
+def _quantile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Metrics:
+    """
+    Histogram latency per stage: rag_stage_seconds{stage="...", ...}.
+
+    Tiap span juga dicatat sebagai satu baris JSON di logger "rag.metrics"
+    dan disimpan di ring buffer `recent` untuk debug panel UI.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, Labels], _Histogram] = {}
+        self.recent: deque = deque(maxlen=200)
+
+    def observe(self, stage: str, seconds: float, **labels) -> None:
+        key = (stage, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        record = {"ts": round(time.time(), 3), "stage": stage, "ms": round(seconds * 1000, 2), **labels}
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                hist = self._series[key] = _Histogram()
+            hist.observe(seconds)
+            self.recent.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def summary(self) -> List[dict]:
+        """Ringkasan per series (count, avg, p50, p95 dalam ms) untuk UI."""
+        with self._lock:
+            items = [(k, h.count, h.sum, list(h.recent)) for k, h in self._series.items()]
+        out = []
+        for (stage, labels), count, total, recent in sorted(items):
+            out.append({
+                "stage": stage,
+                **dict(labels),
+                "count": count,
+                "avg_ms": round(total / count * 1000, 1) if count else 0.0,
+                "p50_ms": round(_quantile(recent, 0.50) * 1000, 1),
+                "p95_ms": round(_quantile(recent, 0.95) * 1000, 1),
+            })
+        return out
+
+    def render_prometheus(self) -> str:
+        """Text exposition format Prometheus (histogram kumulatif)."""
+        with self._lock:
+            items = [(k, list(h.counts), h.sum, h.count) for k, h in self._series.items()]
+
+        lines = [
+            "# HELP rag_stage_seconds Latency per stage pipeline RAG.",
+            "# TYPE rag_stage_seconds histogram",
+        ]
+        for (stage, labels), counts, total, count in sorted(items):
+            base = [("stage", stage), *labels]
+            for bound, n in zip(BUCKETS, counts):
+                lines.append(f"rag_stage_seconds_bucket{{{_fmt_labels(base + [('le', repr(float(bound)))])}}} {n}")
+            lines.append(f"rag_stage_seconds_bucket{{{_fmt_labels(base + [('le', '+Inf')])}}} {count}")
+            lines.append(f"rag_stage_seconds_sum{{{_fmt_labels(base)}}} {total}")
+            lines.append(f"rag_stage_seconds_count{{{_fmt_labels(base)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_labels(labels) -> str:
+    def esc(v: str) -> str:
+        return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{k}="{esc(str(v))}"' for k, v in labels)
+
+
+_METRICS = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _METRICS
+
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[dict]:
+    """
+    Ukur durasi blok `with`. Label boleh ditambah di dalam blok
+    (mis. route yang terpilih):
+
+        with span("route_question") as s:
+            s["route"] = "pasal"
+    """
+    labels = dict(labels)
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        labels.setdefault("error", "1")
+        raise
+    finally:
+        _METRICS.observe(stage, time.perf_counter() - start, **labels)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator: span di sekitar seluruh pemanggilan fungsi."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# =========================================================
+# EXPORT
+# =========================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = _METRICS.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrape tiap beberapa detik tidak perlu masuk log
+        return
+
+
+_SERVER: Optional[ThreadingHTTPServer] = None
+_SERVER_LOCK = threading.Lock()
+
+
+def setup_metrics() -> Optional[ThreadingHTTPServer]:
+    """
+    Aktifkan export metrics (idempotent, sekali per proses):
+
+      METRICS_LOG  = 1 -> span ditulis sebagai JSON per baris ke stderr (default: 0)
+      METRICS_PORT = port endpoint Prometheus GET /metrics (default: kosong = mati)
+      METRICS_HOST = bind address endpoint (default: 127.0.0.1)
+    """
+    global _SERVER
+    with _SERVER_LOCK:
+        if os.getenv("METRICS_LOG", "0") == "1" and not logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+        port = os.getenv("METRICS_PORT")
+        if _SERVER is None and port:
+            _SERVER = ThreadingHTTPServer((os.getenv("METRICS_HOST", "127.0.0.1"), int(port)), _Handler)
+            threading.Thread(target=_SERVER.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(json.dumps({"event": "metrics_server", "port": int(port)}))
+        return _SERVER
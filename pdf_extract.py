@@ -0,0 +1,323 @@
+import io
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+
+from cache_store import DiskLRUCache, cache_dir
+
+
+# =========================================================
+# BACKEND
+# =========================================================
+# Tiap backend: (page_count(src), extract(src, start, end) -> [teks per page]).
+# src = path file atau bytes isi PDF; semua backend bisa parse langsung
+# dari memori, jadi upload tidak perlu ditulis ke disk.
+# Import di dalam fungsi: backend yang tidak terinstall tidak mengganggu.
+
+Source = Union[str, bytes]
+
+
+def as_bytes(buf) -> bytes:
+    """
+    Buffer (memoryview / bytearray / bytes) -> bytes. Tanpa copy kalau
+    memoryview menutupi seluruh objek bytes (InMemoryFile.getbuffer()).
+    """
+    if isinstance(buf, bytes):
+        return buf
+    view = memoryview(buf)
+    if isinstance(view.obj, bytes) and view.contiguous and view.nbytes == len(view.obj):
+        return view.obj
+    return view.tobytes()
+
+
+def _pymupdf_open(src: Source):
+    import pymupdf
+
+    if isinstance(src, str):
+        return pymupdf.open(src)
+    return pymupdf.open(stream=src, filetype="pdf")
+
+
+def _pymupdf_count(src: Source) -> int:
+    with _pymupdf_open(src) as doc:
+        return doc.page_count
+
+
+def _pymupdf_extract(src: Source, start: int, end: int) -> List[str]:
+    with _pymupdf_open(src) as doc:
+        return [doc[i].get_text("text") for i in range(start, end)]
+
+
+def _pdfium_count(src: Source) -> int:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(src)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pdfium_extract(src: Source, start: int, end: int) -> List[str]:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(src)
+    out = []
+    try:
+        for i in range(start, end):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            out.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return out
+
+
+def _pypdf_reader(src: Source):
+    from pypdf import PdfReader
+
+    # BytesIO di atas bytes berbagi buffer (tidak di-copy selama tidak ditulis)
+    return PdfReader(src if isinstance(src, str) else io.BytesIO(src))
+
+
+def _pypdf_count(src: Source) -> int:
+    return len(_pypdf_reader(src).pages)
+
+
+def _pypdf_extract(src: Source, start: int, end: int) -> List[str]:
+    # sama dengan PyPDFLoader (mode plain)
+    pages = _pypdf_reader(src).pages
+    return [pages[i].extract_text() for i in range(start, end)]
+
+
+# urutan = preferensi mode auto (tercepat dulu)
+BACKENDS: Dict[str, Tuple[str, Callable[[Source], int], Callable[[Source, int, int], List[str]]]] = {
+    "pymupdf": ("pymupdf", _pymupdf_count, _pymupdf_extract),
+    "pypdfium2": ("pypdfium2", _pdfium_count, _pdfium_extract),
+    "pypdf": ("pypdf", _pypdf_count, _pypdf_extract),
+}
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def pdf_backend() -> str:
+    """
+    Backend ekstraksi teks PDF:
+
+      PDF_BACKEND = auto | pymupdf | pypdfium2 | pypdf   (default: auto)
+
+    auto = backend tercepat yang terinstall (pymupdf > pypdfium2 > pypdf).
+    Teks hasil tiap backend sedikit berbeda, jadi nama backend ikut
+    index_key dan key cache page.
+    """
+    global _BACKEND
+    name = os.getenv("PDF_BACKEND", "auto").lower()
+    if name == "auto":
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = next((n for n, (module, _, _) in BACKENDS.items() if _installed(module)), "pypdf")
+            return _BACKEND
+
+    if name not in BACKENDS:
+        raise ValueError(f"PDF_BACKEND tidak dikenal: {name} (pilihan: auto, {', '.join(BACKENDS)})")
+    module = BACKENDS[name][0]
+    if not _installed(module):
+        raise ImportError(f"{module} belum terinstall. Install dengan: pip install {module}")
+    return name
+
+
+# isi PDF per worker process (doc_id -> src), diisi sekali oleh init_sources
+_SOURCES: Dict[str, Source] = {}
+
+
+def init_sources(sources: Dict[str, Source]) -> None:
+    """
+    Initializer ProcessPoolExecutor: isi semua PDF dikirim sekali per
+    worker, task cukup membawa (backend, doc_id, start, end).
+    """
+    global _SOURCES
+    _SOURCES = sources
+
+
+def extract_range(task: Tuple[str, str, int, int], sources: Optional[Dict[str, Source]] = None) -> List[str]:
+    """
+    Worker: teks page [start, end) satu PDF (doc_id dicari di `sources`,
+    default: hasil init_sources). Module-level supaya bisa dipakai oleh
+    ProcessPoolExecutor.
+    """
+    backend, doc_id, start, end = task
+    src = (_SOURCES if sources is None else sources)[doc_id]
+    return BACKENDS[backend][2](src, start, end)
+
+
+# =========================================================
+# PAGE CACHE (file hash + nomor page)
+# =========================================================
+
+class PageTextCache:
+    """
+    Teks page PDF hasil ekstraksi, key = (backend, sha256 file, page).
+    Jumlah page per file juga dicatat, jadi file yang sudah pernah
+    diproses tidak perlu dibuka sama sekali.
+    """
+
+    def __init__(self, cache: DiskLRUCache):
+        self.cache = cache
+
+    @staticmethod
+    def _key(backend: str, digest: str, page) -> str:
+        return f"{backend}:{digest}:{page}"
+
+    def page_count(self, backend: str, digest: str) -> Optional[int]:
+        raw = self.cache.get(self._key(backend, digest, "n"))
+        return None if raw is None else int(raw)
+
+    def get_pages(self, backend: str, digest: str, pages: List[int]) -> Dict[int, str]:
+        keys = {i: self._key(backend, digest, i) for i in pages}
+        found = self.cache.get_many(keys.values())
+        return {i: found[key].decode("utf-8") for i, key in keys.items() if key in found}
+
+    def put_pages(self, backend: str, digest: str, n_pages: int, texts: Dict[int, str]) -> None:
+        items = {self._key(backend, digest, i): t.encode("utf-8") for i, t in texts.items()}
+        items[self._key(backend, digest, "n")] = str(n_pages).encode("ascii")
+        self.cache.put_many(items)
+
+
+_PAGE_CACHE = None
+_PAGE_CACHE_LOCK = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageTextCache]:
+    """
+      PDF_PAGE_CACHE             = 1 | 0   (default: 1)
+      PDF_PAGE_CACHE_MAX_ENTRIES = int     (default: 200000 page)
+    """
+    if os.getenv("PDF_PAGE_CACHE", "1") == "0":
+        return None
+
+    global _PAGE_CACHE
+    with _PAGE_CACHE_LOCK:
+        if _PAGE_CACHE is None:
+            _PAGE_CACHE = PageTextCache(DiskLRUCache(
+                os.path.join(cache_dir(), "pdf_pages.sqlite"),
+                max_entries=int(os.getenv("PDF_PAGE_CACHE_MAX_ENTRIES", "200000")),
+            ))
+        return _PAGE_CACHE
+
+
+# =========================================================
+# EKSTRAKSI
+# =========================================================
+
+# range page terkecil per task (overhead buka file di tiap worker)
+MIN_PAGES_PER_TASK = 8
+
+
+def _ranges(pages: List[int], parts: int) -> List[Tuple[int, int]]:
+    """
+    Page (terurut) -> range [start, end) bersambung, dipecah jadi kira-kira
+    `parts` task (parts <= 0: per MIN_PAGES_PER_TASK page).
+    """
+    if not pages:
+        return []
+    if parts <= 0:
+        size = MIN_PAGES_PER_TASK
+    else:
+        size = max(MIN_PAGES_PER_TASK, -(-len(pages) // parts))
+    out = []
+    start = prev = pages[0]
+    for p in pages[1:] + [None]:
+        if p is not None and p == prev + 1 and p - start < size:
+            prev = p
+            continue
+        out.append((start, prev + 1))
+        if p is not None:
+            start = prev = p
+    return out
+
+
+def _page_doc(source: str, doc_id: str, page: int, text: str) -> Document:
+    # metadata sama dengan PyPDFLoader (page 0-based) + doc_id
+    return Document(page_content=text, metadata={"source": source, "page": page, "doc_id": doc_id})
+
+
+class PdfExtraction:
+    """
+    Ekstraksi satu PDF dalam dua langkah, supaya page dari banyak file
+    bisa dikerjakan paralel di satu pool:
+
+      job = PdfExtraction(f.getbuffer(), f.name, doc_id, parts)  # cek cache, susun task
+      results = map(extract_range, job.tasks)                     # worker: init_sources({doc_id: job.src})
+      docs = job.complete(results)                                # simpan cache, Document per page
+
+    `src` = path file atau buffer isi PDF (memoryview / bytes); metadata
+    "source" = `source`. Task = (backend, doc_id, start, end): isi PDF
+    tidak ikut di-pickle per task. Kalau semua page sudah ada di cache,
+    `tasks` kosong dan PDF tidak di-parse sama sekali.
+    """
+
+    def __init__(self, src, source: str, doc_id: str, parts: int = 1):
+        # bytes (bukan memoryview) supaya bisa di-pickle ke process pool
+        self.src = src if isinstance(src, str) else as_bytes(src)
+        self.source = source
+        self.doc_id = doc_id
+        self.backend = pdf_backend()
+        self.cache = get_page_cache()
+
+        n_pages = self.cache.page_count(self.backend, doc_id) if self.cache else None
+        if n_pages is None:
+            n_pages = BACKENDS[self.backend][1](self.src)
+        self.n_pages = n_pages
+
+        self.texts = self.cache.get_pages(self.backend, doc_id, list(range(n_pages))) if self.cache else {}
+        missing = [i for i in range(n_pages) if i not in self.texts]
+        self.tasks = [(self.backend, doc_id, start, end) for start, end in _ranges(missing, parts)]
+
+    def complete(self, results) -> List[Document]:
+        extracted: Dict[int, str] = {}
+        for (_, _, start, _), texts in zip(self.tasks, results):
+            for offset, text in enumerate(texts):
+                extracted[start + offset] = text or ""
+
+        if self.cache is not None and (extracted or not self.texts):
+            self.cache.put_pages(self.backend, self.doc_id, self.n_pages, extracted)
+        self.texts.update(extracted)
+        return [_page_doc(self.source, self.doc_id, i, self.texts[i]) for i in range(self.n_pages)]
+
+
+def iter_pdf_pages(src, source: str, doc_id: str) -> Iterator[Document]:
+    """
+    Versi lazy untuk streaming ingest: page di-yield berurutan, diekstrak
+    per MIN_PAGES_PER_TASK page (serial) kalau belum ada di cache.
+    """
+    job = PdfExtraction(src, source, doc_id, parts=0)
+    sources = {doc_id: job.src}
+    for task in job.tasks:
+        _, _, start, end = task
+        extracted = {start + offset: text or "" for offset, text in enumerate(extract_range(task, sources))}
+        if job.cache is not None:
+            job.cache.put_pages(job.backend, doc_id, job.n_pages, extracted)
+        job.texts.update(extracted)
+
+        # yield page yang sudah lengkap sampai `end`, lalu lepas dari memori
+        yield from _flush(job, end)
+    yield from _flush(job, job.n_pages)
+
+
+def _flush(job: PdfExtraction, end: int) -> Iterator[Document]:
+    for i in sorted(p for p in job.texts if p < end):
+        yield _page_doc(job.source, job.doc_id, i, job.texts.pop(i))
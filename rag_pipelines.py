@@ -1,50 +1,166 @@
+import io
+import multiprocessing
 import os
 import re
-import tempfile
-from typing import List, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    Docx2txtLoader,
-)
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain_ollama import ChatOllama
 
-from embedding_factory import get_embeddings
+from context_packer import pack_context
+from dedupe import ChunkDeduper, get_boilerplate_stripper, new_chunk_deduper
+from docstore import get_docstore
+from embedding_factory import get_cached_embeddings
+from index_store import chunk_params, chunking_mode, file_digest
+from legal_index import AYAT_PATTERN, SANCTION_KEYWORDS, PasalExtractor, PasalIndex, SectionSplitter
+from llm_factory import get_llm, get_llm_model
+from metrics import get_metrics, span, timed
+from pdf_extract import PdfExtraction, as_bytes, extract_range, init_sources, iter_pdf_pages
+from response_cache import get_response_cache
+from semantic_cache import get_semantic_cache
+from vector_index import VectorIndexBuilder, clone_vectorstore, delete_vectors
+
+
+# on_progress(stage, **info), lihat ingest_documents
+ProgressCallback = Callable[..., None]
 
 
 # =========================================================
 # 1) LOAD DOCUMENTS (streamlit-friendly)
 # =========================================================
 
-def load_documents(files) -> list:
+def _is_pdf(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() == ".pdf"
+
+
+def _load_bytes(task: Tuple[str, object, str]) -> list:
     """
-    Terima list of UploadedFile (Streamlit),
-    simpan ke temp dir, lalu load via LangChain loader.
+    Worker: parse satu file non-PDF langsung dari isinya (buffer),
+    tanpa file di disk. Module-level supaya bisa dipakai oleh
+    ProcessPoolExecutor. PDF lewat pdf_extract, lihat load_documents.
     """
-    docs = []
-    tmp_dir = tempfile.mkdtemp(prefix="rag_upload_")
+    name, data, doc_id = task
+    if os.path.splitext(name)[1].lower() == ".docx":
+        import docx2txt
+
+        # docx = zip; ZipFile bisa baca dari BytesIO (sama dengan Docx2txtLoader)
+        text = docx2txt.process(io.BytesIO(as_bytes(data)))
+    else:
+        text = str(data, "utf-8")
+    return [Document(page_content=text, metadata={"source": name, "doc_id": doc_id})]
+
+
+def _configured_workers(max_workers: Optional[int]) -> int:
+    if max_workers is None:
+        max_workers = int(os.getenv("LOAD_WORKERS", "0")) or (os.cpu_count() or 1)
+    return max(1, max_workers)
+
+
+def _load_workers(n_tasks: int, max_workers: Optional[int]) -> int:
+    return max(1, min(_configured_workers(max_workers), n_tasks))
+
+
+def _collect_loaded(range_results, other_results, on_progress: Optional[ProgressCallback],
+                    pages: int) -> Tuple[list, list]:
+    # hasil map() datang berurutan: progress "loading" dilaporkan per range
+    # page / per file, callback yang raise langsung membatalkan load
+    range_texts, other_docs = [], []
+    for texts in range_results:
+        range_texts.append(texts)
+        pages += len(texts)
+        _report(on_progress, "loading", pages=pages)
+    for docs in other_results:
+        other_docs.append(docs)
+        pages += len(docs)
+        _report(on_progress, "loading", pages=pages)
+    return range_texts, other_docs
+
+
+@timed("load_documents")
+def load_documents(files, max_workers: Optional[int] = None,
+                   on_progress: Optional[ProgressCallback] = None) -> list:
+    """
+    Terima list of UploadedFile (Streamlit) / apapun yang punya name +
+    getbuffer(), lalu parse langsung dari buffer di memori: tidak ada
+    file sementara yang ditulis (metadata "source" = nama file upload).
 
-    for f in files:
-        filename = os.path.basename(f.name)
-        file_path = os.path.join(tmp_dir, filename)
+    Setiap page diberi metadata doc_id (sha256 isi file) supaya
+    chunk & pasal bisa dihapus per dokumen (lihat remove_documents).
 
-        with open(file_path, "wb") as out:
-            out.write(f.getbuffer())
+    PDF diekstrak lewat pdf_extract (PDF_BACKEND) per range page, jadi satu
+    PDF besar pun terbagi ke semua worker; teks page di-cache per (sha256
+    file, page), PDF yang pernah diproses tidak di-parse ulang.
 
-        ext = os.path.splitext(filename)[1].lower()
+    Parsing (CPU-bound) jalan paralel di process pool:
+      LOAD_WORKERS = jumlah worker (default: jumlah CPU, 1 = serial)
+    Urutan output tetap sama dengan urutan `files`.
 
-        if ext == ".pdf":
-            loader = PyPDFLoader(file_path)
-        elif ext == ".docx":
-            loader = Docx2txtLoader(file_path)
+    `on_progress("loading", pages=n)` dipanggil tiap range page / file
+    selesai; callback boleh raise untuk membatalkan (task yang belum jalan
+    dibuang).
+    """
+    tasks = []
+    seen = set()
+    for f in files:
+        # file dengan isi identik cukup di-load sekali
+        doc_id = file_digest(f)
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        tasks.append((os.path.basename(f.name), f.getbuffer(), doc_id))
+
+    with span("load_documents.parse"):
+        # PDF: cek cache page dulu, sisanya dipecah jadi task range page
+        parts = _configured_workers(max_workers)
+        pdfs = {i: PdfExtraction(data, name, doc_id, parts) for i, (name, data, doc_id) in enumerate(tasks) if _is_pdf(name)}
+        ranges = [task for job in pdfs.values() for task in job.tasks]
+        sources = {job.doc_id: job.src for job in pdfs.values() if job.tasks}
+        others = [task for i, task in enumerate(tasks) if i not in pdfs]
+
+        cached = sum(len(job.texts) for job in pdfs.values())
+        _report(on_progress, "loading", pages=cached)
+
+        workers = _load_workers(len(ranges) + len(others), max_workers)
+        if workers == 1:
+            range_texts, other_docs = _collect_loaded(
+                (extract_range(task, sources) for task in ranges), map(_load_bytes, others), on_progress, cached,
+            )
         else:
-            loader = TextLoader(file_path, encoding="utf-8")
-
-        docs.extend(loader.load())
+            # memoryview tidak bisa di-pickle: worker dapat bytes
+            others = [(name, as_bytes(data), doc_id) for name, data, doc_id in others]
+            # isi PDF dikirim sekali per worker (initializer), bukan per task range.
+            # spawn, bukan fork: dipanggil dari thread ingest di server Streamlit
+            # yang multi-thread, fork bisa mewarisi lock yang sedang dipegang thread lain
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_sources, initargs=(sources,),
+            ) as pool:
+                try:
+                    # map() menjaga urutan -> output deterministik
+                    range_texts, other_docs = _collect_loaded(
+                        pool.map(extract_range, ranges), pool.map(_load_bytes, others), on_progress, cached,
+                    )
+                except BaseException:
+                    # batal / gagal: jangan tunggu task yang belum jalan
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+        results = []
+        range_iter, other_iter = iter(range_texts), iter(other_docs)
+        for i in range(len(tasks)):
+            if i in pdfs:
+                job = pdfs[i]
+                results.append(job.complete([next(range_iter) for _ in job.tasks]))
+            else:
+                results.append(next(other_iter))
 
+    docs = []
+    for file_docs in results:
+        docs.extend(file_docs)
     return docs
 
 
@@ -52,122 +168,563 @@ def load_documents(files) -> list:
 # 2) VECTORSTORE
 # =========================================================
 
-def create_vectorstore(docs) -> FAISS:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=900,
-        chunk_overlap=200,
+def _make_splitter() -> RecursiveCharacterTextSplitter:
+    chunk_size, chunk_overlap = chunk_params()
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        # posisi chunk di page, dipakai context_packer untuk menggabung overlap
+        add_start_index=True,
     )
-    chunks = splitter.split_documents(docs)
 
-    embeddings = get_embeddings()
-    vectorstore = FAISS.from_documents(chunks, embeddings)
-    return vectorstore
 
+def _split_pasal(section: Document, max_chars: int, fallback: RecursiveCharacterTextSplitter) -> List[Document]:
+    """
+    Pasal yang lebih panjang dari chunk_size: potong di batas ayat (ayat
+    dikelompokkan sampai max_chars), tiap potongan diawali baris "Pasal N".
+    Ayat yang sendirian masih terlalu panjang dipotong fallback splitter.
+    """
+    text = section.page_content
+    header, _, body = text.partition("\n")
+    starts = [m.start() for m in AYAT_PATTERN.finditer(body)]
+    if not starts:
+        starts = [0]
+    spans = [body[a:b].strip() for a, b in zip([0] + starts[1:], starts[1:] + [len(body)])]
+    numbers = [int(m.group(1)) for m in AYAT_PATTERN.finditer(body)] or [None]
+
+    room = max_chars - len(header) - 1
+    groups: List[list] = []  # [nomor ayat, teks]
+    for no, span_text in zip(numbers, spans):
+        if groups and len(groups[-1][1]) + 1 + len(span_text) <= room:
+            groups[-1][0].append(no)
+            groups[-1][1] += "\n" + span_text
+        else:
+            groups.append([[no], span_text])
 
-# =========================================================
-# 3) PASAL INDEX (deterministic legal retrieval)
-# =========================================================
+    out = []
+    for group_numbers, group_text in groups:
+        ayat = [a for a in group_numbers if a is not None]
+        pieces = [group_text] if len(group_text) <= room else fallback.split_text(group_text)
+        for piece in pieces:
+            meta = dict(section.metadata)
+            if ayat:
+                meta["ayat"] = ayat
+            out.append(Document(page_content=f"{header}\n{piece}", metadata=meta))
+    return out
 
-PASAL_PATTERN = re.compile(r"(?im)^\s*(Pasal\s+(\d+))\s*$")
 
-def build_pasal_index(docs) -> list:
+def iter_legal_chunks(pages: Iterable) -> Iterator[Document]:
     """
-    Extract semua blok Pasal dari dokumen.
-    Return list of dict:
-    {
-      pasal_no,
-      pasal_label,
-      content,
-      source,
-      page
-    }
+    Chunking mengikuti struktur UU (CHUNKING=legal):
+
+    - satu chunk = satu atau beberapa Pasal berurutan dalam BAB yang sama,
+      sampai CHUNK_SIZE karakter; BAB baru selalu mulai chunk baru dan
+      heading-nya ikut chunk itu;
+    - Pasal yang lebih panjang dipotong di batas ayat (_split_pasal);
+    - teks di luar pasal (pembukaan, dokumen tanpa struktur pasal) dan ayat
+      yang terlalu panjang dipotong RecursiveCharacterTextSplitter dengan
+      overlap CHUNK_OVERLAP / 4.
+
+    Tanpa overlap antar pasal. Metadata chunk: source, page (awal),
+    doc_id, bab, pasal (list nomor), ayat (kalau pasal dipotong).
     """
-    pasals = []
+    chunk_size, chunk_overlap = chunk_params()
+    fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap // 4)
+    sections = SectionSplitter()
+
+    pending: List[Document] = []
+    size = 0
+
+    def flush() -> Iterator[Document]:
+        nonlocal size
+        if not pending:
+            return
+        meta = {k: v for k, v in pending[0].metadata.items() if k not in ("section", "pasal", "bab")}
+        if pending[-1].metadata.get("bab"):
+            meta["bab"] = pending[-1].metadata["bab"]
+        pasals = [d.metadata["pasal"] for d in pending if d.metadata.get("pasal") is not None]
+        if pasals:
+            meta["pasal"] = pasals
+        if len(pasals) == 1:
+            for d in pending:
+                if "ayat" in d.metadata:
+                    meta["ayat"] = d.metadata["ayat"]
+        yield Document(page_content="\n\n".join(d.page_content for d in pending), metadata=meta)
+        pending.clear()
+        size = 0
+
+    def pieces(section: Document) -> List[Document]:
+        if len(section.page_content) <= chunk_size:
+            return [section]
+        if section.metadata["section"] == "pasal":
+            return _split_pasal(section, chunk_size, fallback)
+        return [
+            Document(page_content=t, metadata=dict(section.metadata))
+            for t in fallback.split_text(section.page_content)
+        ]
+
+    def add(section: Document) -> Iterator[Document]:
+        nonlocal size
+        if pending and (
+            section.metadata["doc_id"] != pending[-1].metadata["doc_id"]
+            or section.metadata["section"] == "bab"
+        ):
+            yield from flush()
+        for piece in pieces(section):
+            n = len(piece.page_content)
+            # heading BAB (pendek) selalu ikut chunk berikutnya walau sedikit melebihi chunk_size
+            only_headings = all(d.metadata["section"] == "bab" for d in pending)
+            if pending and not only_headings and size + 2 + n > chunk_size:
+                yield from flush()
+            pending.append(piece)
+            size += n + (2 if size else 0)
+
+    for page in pages:
+        for section in sections.feed(page):
+            yield from add(section)
+    for section in sections.finish():
+        yield from add(section)
+    yield from flush()
+
+
+def iter_chunks(pages: Iterable, counters: Optional[dict] = None) -> Iterator[Tuple[Document, str]]:
+    """
+    Split pages -> chunks secara lazy (page per page), sesuai CHUNKING
+    (legal: iter_legal_chunks, recursive: splitter per page).
+    Yield (chunk, id) dengan id "<doc_id>:<urutan chunk>",
+    jadi semua vektor milik satu dokumen bisa dicari dari prefix id.
+    """
+    counters = {} if counters is None else counters
+
+    if chunking_mode() == "legal":
+        chunks = iter_legal_chunks(pages)
+    else:
+        splitter = _make_splitter()
+        chunks = (c for page in pages for c in splitter.split_documents([page]))
+
+    for c in chunks:
+        doc_id = c.metadata.get("doc_id", "unknown")
+        n = counters.get(doc_id, 0)
+        counters[doc_id] = n + 1
+        yield c, f"{doc_id}:{n}"
 
-    for d in docs:
-        text = d.page_content or ""
-        source = d.metadata.get("source", "unknown")
-        page = d.metadata.get("page", None)
 
-        matches = list(PASAL_PATTERN.finditer(text))
-        if not matches:
+def split_documents(docs, deduper: Optional[ChunkDeduper] = None) -> Tuple[list, List[str]]:
+    """
+    Split pages -> chunks.
+    Return (chunks, ids), lihat iter_chunks.
+
+    Dengan `deduper`, chunk duplikat (exact / near) dibuang; sumbernya
+    dicatat di metadata "duplicates" chunk kanonik.
+    """
+    chunks, ids = [], []
+    for c, _id in iter_chunks(docs):
+        if deduper is not None and deduper.check(c, _id) is not None:
             continue
+        chunks.append(c)
+        ids.append(_id)
 
-        for i, m in enumerate(matches):
-            pasal_label = m.group(1).strip()
-            pasal_no = int(m.group(2))
-            start = m.end()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-            body = text[start:end].strip()
-
-            if body:
-                pasals.append({
-                    "pasal_no": pasal_no,
-                    "pasal_label": pasal_label,
-                    "content": body,
-                    "source": source,
-                    "page": page,
-                })
+    if deduper is not None and deduper.references:
+        for c, _id in zip(chunks, ids):
+            refs = deduper.references.get(_id)
+            if refs:
+                c.metadata["duplicates"] = refs
+    return chunks, ids
+
+
+def _chunk_deduper(vectorstore: Optional[FAISS] = None) -> Optional[ChunkDeduper]:
+    """
+    new_chunk_deduper, di-seed dengan chunk yang sudah ada di `vectorstore`
+    (incremental ingest): dokumen baru yang menduplikasi isi index lama
+    tidak di-embed ulang, referensinya ditempel ke chunk kanonik lama.
+    """
+    deduper = new_chunk_deduper()
+    if deduper is None or vectorstore is None:
+        return deduper
+    with span("dedupe.seed"):
+        docstore = vectorstore.docstore
+        for _id in vectorstore.index_to_docstore_id.values():
+            doc = docstore.search(_id)
+            if not isinstance(doc, str):
+                deduper.seed(doc, _id)
+    return deduper
+
+
+def _attach_duplicates(vectorstore: Optional[FAISS], deduper: ChunkDeduper, skip: Iterable[str] = ()) -> None:
+    # chunk kanonik yang sudah ada di index (streaming: sudah di-flush; incremental:
+    # chunk lama) -> metadata "duplicates" di docstore yang di-update
+    if vectorstore is None:
+        return
+    skip = set(skip)
+    updated = {}
+    for _id in deduper.updated:
+        if _id in skip:
+            continue
+        doc = vectorstore.docstore.search(_id)
+        if isinstance(doc, str):
+            continue
+        doc.metadata["duplicates"] = deduper.references[_id]
+        updated[_id] = doc
+    _put_docs(vectorstore, updated)
 
-    return pasals
+
+def _put_docs(vectorstore: FAISS, docs: Dict[str, Document]) -> None:
+    # tulis ulang metadata chunk yang sudah ada (InMemoryDocstore.add menolak id lama)
+    docstore = vectorstore.docstore
+    if isinstance(docstore, InMemoryDocstore):
+        docstore._dict.update(docs)
+    elif docs:
+        docstore.add(docs)
+
+
+def _report(on_progress: Optional[ProgressCallback], stage: str, **info) -> None:
+    if on_progress is not None:
+        on_progress(stage, **info)
+
+
+def _embed_chunks(builder: VectorIndexBuilder, chunks: list, ids: List[str],
+                  on_progress: Optional[ProgressCallback] = None) -> None:
+    """
+    Embed chunk per INGEST_BATCH_SIZE lalu add ke builder,
+    melaporkan progress ("embedding", done=..., total=...) tiap batch.
+    """
+    batch_size = int(os.getenv("INGEST_BATCH_SIZE", "128"))
+    total = len(chunks)
+    _report(on_progress, "embedding", done=0, total=total)
+
+    for i in range(0, total, batch_size):
+        batch = chunks[i:i + batch_size]
+        texts = [c.page_content for c in batch]
+        vectors = builder.embeddings.embed_documents(texts)
+        builder.add(texts, vectors, [c.metadata for c in batch], ids[i:i + batch_size])
+        _report(on_progress, "embedding", done=min(i + batch_size, total), total=total)
+
+
+@timed("create_vectorstore")
+def create_vectorstore(docs, on_progress: Optional[ProgressCallback] = None) -> FAISS:
+    """
+    Split -> embed -> FAISS. Tipe index (flat/hnsw/ivf/ivfpq) mengikuti
+    FAISS_INDEX_TYPE, lihat vector_index.py.
+    """
+    with span("create_vectorstore.split"):
+        chunks, ids = split_documents(docs, new_chunk_deduper())
+
+    # chunk yang sudah pernah di-embed diambil dari cache disk
+    builder = VectorIndexBuilder(get_cached_embeddings())
+    with span("create_vectorstore.embed"):
+        _embed_chunks(builder, chunks, ids, on_progress)
+
+    with span("create_vectorstore.build"):
+        vectorstore = builder.finish()
+    if vectorstore is None:
+        raise ValueError("Tidak ada teks yang bisa diindeks dari dokumen.")
+    return vectorstore
+
+
+def add_documents(vectorstore: FAISS, pasal_index: PasalIndex, docs,
+                  on_progress: Optional[ProgressCallback] = None) -> None:
+    """
+    Incremental ingest: chunk + embed hanya `docs` baru,
+    lalu append ke vectorstore & pasal_index yang sudah ada (in-place).
+    Chunk baru di-dedupe juga terhadap chunk yang sudah ada di index.
+    """
+    pasal_index.extend(extract_pasals(docs))
+    _report(on_progress, "pasal_index", pasal_index=pasal_index)
+
+    deduper = _chunk_deduper(vectorstore)
+    chunks, ids = split_documents(docs, deduper)
+    builder = VectorIndexBuilder(get_cached_embeddings(), vectorstore)
+    _embed_chunks(builder, chunks, ids, on_progress)
+    if deduper is not None:
+        _attach_duplicates(vectorstore, deduper, skip=ids)
+
+
+def remove_documents(vectorstore: FAISS, pasal_index: PasalIndex, doc_ids, surviving: Iterable[str]) -> None:
+    """
+    Hapus semua vektor & pasal milik doc_ids (in-place).
+
+    Chunk kanonik yang dihapus tapi punya duplikat di dokumen yang tetap
+    ada (metadata "duplicates") di-index ulang atas nama dokumen itu,
+    supaya isinya tidak ikut hilang dari index. Referensi duplikat ke
+    doc_ids di chunk yang tetap ada ikut dibuang.
+
+    `surviving` = doc_id yang tetap ada di index setelah penghapusan.
+    Tidak bisa diturunkan dari vektor: dokumen yang semua chunknya
+    duplikat tidak punya vektor sendiri.
+    """
+    doc_ids = set(doc_ids)
+    present = set(surviving) - doc_ids
+    stale = [
+        _id for _id in vectorstore.index_to_docstore_id.values()
+        if _id.split(":", 1)[0] in doc_ids
+    ]
+
+    # chunk yang tetap ada: buang referensi duplikat ke dokumen yang dihapus
+    stale_set = set(stale)
+    pruned = {}
+    for _id in vectorstore.index_to_docstore_id.values():
+        if _id in stale_set:
+            continue
+        doc = vectorstore.docstore.search(_id)
+        if isinstance(doc, str) or "duplicates" not in doc.metadata:
+            continue
+        refs = [r for r in doc.metadata["duplicates"] if r.get("doc_id") not in doc_ids]
+        if len(refs) == len(doc.metadata["duplicates"]):
+            continue
+        if refs:
+            doc.metadata["duplicates"] = refs
+        else:
+            del doc.metadata["duplicates"]
+        pruned[_id] = doc
+    _put_docs(vectorstore, pruned)
+
+    rehomed, rehomed_ids = [], []
+    for _id in stale:
+        doc = vectorstore.docstore.search(_id)
+        if isinstance(doc, str):
+            continue
+        refs = [
+            r for r in doc.metadata.get("duplicates", ())
+            if r.get("doc_id") in present
+        ]
+        if not refs:
+            continue
+        heir, rest = refs[0], refs[1:]
+        meta = {k: v for k, v in doc.metadata.items() if k not in ("duplicates", "pasal", "bab", "page", "start_index")}
+        meta.update({k: v for k, v in heir.items() if k != "id"})
+        if rest:
+            meta["duplicates"] = rest
+        rehomed.append(Document(page_content=doc.page_content, metadata=meta))
+        rehomed_ids.append(heir["id"])
+
+    if stale:
+        delete_vectors(vectorstore, stale)
+    if rehomed:
+        builder = VectorIndexBuilder(get_cached_embeddings(), vectorstore)
+        _embed_chunks(builder, rehomed, rehomed_ids)
+    pasal_index.remove_docs(doc_ids)
+
+
+def copy_index(vectorstore: FAISS, pasal_index: PasalIndex) -> Tuple[FAISS, PasalIndex]:
+    """
+    Salinan (vectorstore, pasal_index) untuk incremental update tanpa
+    mengubah index yang sedang dipakai bersama sesi lain.
+    """
+    return clone_vectorstore(vectorstore), pasal_index.copy()
 
 
 # =========================================================
-# 4) PASAL SCORING & FINDER
+# 2b) STREAMING INGEST (bounded memory)
 # =========================================================
 
-SANCTION_KEYWORDS = [
-    "sanksi", "denda", "pidana", "penjara",
-    "kurungan", "administratif", "ganti rugi"
-]
+def iter_documents(files) -> Iterator[Document]:
+    """
+    Versi lazy dari load_documents: page di-yield satu per satu
+    (iter_pdf_pages), tanpa menampung seluruh teks dokumen di memori.
+    """
+    seen = set()
+    for f in files:
+        doc_id = file_digest(f)
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
 
-def score_pasal(content: str, query: str) -> int:
-    t = content.lower()
-    q = query.lower()
-    score = 0
+        name = os.path.basename(f.name)
+        if _is_pdf(name):
+            yield from iter_pdf_pages(f.getbuffer(), name, doc_id)
+        else:
+            yield from _load_bytes((name, f.getbuffer(), doc_id))
+
+
+@timed("ingest_streaming")
+def ingest_streaming(
+    files,
+    vectorstore: Optional[FAISS] = None,
+    pasal_index: Optional[PasalIndex] = None,
+    batch_size: Optional[int] = None,
+    max_buffer_mb: Optional[float] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Tuple[Optional[FAISS], PasalIndex]:
+    """
+    Pipeline generator: load page -> buang header/footer -> pasal index
+    -> split -> dedupe -> embed per batch -> add ke FAISS, page demi page.
+    Yang ditahan di memori hanya satu batch chunk (plus index yang sedang
+    dibangun; untuk ivf/ivfpq juga sampel training sampai index di-train,
+    lihat VectorIndexBuilder), sampel page untuk deteksi boilerplate, dan
+    signature MinHash per chunk (~0.5 KB) untuk dedupe.
+
+      INGEST_BATCH_SIZE    = chunk per flush ke embedding (default: 128,
+                             kira-kira EMBED_BATCH_SIZE x EMBED_CONCURRENCY)
+      INGEST_MAX_BUFFER_MB = batas teks chunk yang ditahan sebelum di-flush
+                             (default: 8)
+
+    Kalau `vectorstore` / `pasal_index` diberikan, hasilnya di-append ke sana
+    (incremental). Return (vectorstore, pasal_index); vectorstore None kalau
+    tidak ada chunk sama sekali.
+
+    Progress: ("loading", pages=n) per page, ("embedding", done=n) per flush,
+    ("pasal_index", pasal_index=...) setelah semua page terbaca.
+    """
+    if batch_size is None:
+        batch_size = int(os.getenv("INGEST_BATCH_SIZE", "128"))
+    if max_buffer_mb is None:
+        max_buffer_mb = float(os.getenv("INGEST_MAX_BUFFER_MB", "8"))
+    max_buffer_chars = int(max_buffer_mb * 1024 * 1024)
+
+    if pasal_index is None:
+        pasal_index = PasalIndex(store=get_docstore())
+    embeddings = get_cached_embeddings()
+    builder = VectorIndexBuilder(embeddings, vectorstore)
+
+    texts, metadatas, ids = [], [], []
+    buffered_chars = 0
+    embedded = 0
+
+    def flush():
+        nonlocal buffered_chars, embedded
+        if not texts:
+            return
+        builder.add(texts, embeddings.embed_documents(texts), metadatas, ids)
+        embedded += len(texts)
+        _report(on_progress, "embedding", done=embedded, total=None)
+        texts.clear()
+        metadatas.clear()
+        ids.clear()
+        buffered_chars = 0
+
+    extractor = PasalExtractor()
+    deduper = _chunk_deduper(vectorstore)
+    stripper = get_boilerplate_stripper()
+    pages = iter_documents(files) if stripper is None else stripper.strip_all(iter_documents(files))
+
+    def pages_with_pasals():
+        for n, page in enumerate(pages, 1):
+            pasal_index.extend(extractor.feed(page))
+            _report(on_progress, "loading", pages=n)
+            yield page
+        pasal_index.extend(extractor.finish())
+        _report(on_progress, "pasal_index", pasal_index=pasal_index)
+
+    for chunk, _id in iter_chunks(pages_with_pasals()):
+        if deduper is not None and deduper.check(chunk, _id) is not None:
+            continue
+        texts.append(chunk.page_content)
+        metadatas.append(chunk.metadata)
+        ids.append(_id)
+        buffered_chars += len(chunk.page_content)
 
-    for k in SANCTION_KEYWORDS:
-        if k in q and k in t:
-            score += 10
+        if len(texts) >= batch_size or buffered_chars >= max_buffer_chars:
+            flush()
 
-    for token in re.findall(r"\b[a-zA-Z]{4,}\b", q):
-        if token in t:
-            score += 1
+    flush()
+    vectorstore = builder.finish()
+    if deduper is not None:
+        _attach_duplicates(vectorstore, deduper)
+    return vectorstore, pasal_index
 
-    return score
 
+@timed("ingest_documents")
+def ingest_documents(files, vectorstore: Optional[FAISS] = None, pasal_index: Optional[PasalIndex] = None,
+                     on_progress: Optional[ProgressCallback] = None) -> Tuple[Optional[FAISS], PasalIndex]:
+    """
+    Entry point ingest untuk UI.
 
-def find_relevant_pasals(pasals: list, query: str, top_k: int = 3) -> list:
-    scored = []
-    for p in pasals:
-        s = score_pasal(p["content"], query)
-        if s > 0:
-            scored.append((s, p))
+      INGEST_MODE = batch | stream   (default: batch)
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [p for _, p in scored[:top_k]]
+    batch  : load_documents (paralel) -> buang header/footer berulang
+             -> build_pasal_index -> create_vectorstore (chunk duplikat
+             di-embed sekali, lihat dedupe.py)
+    stream : ingest_streaming (memory terbatas, cocok untuk korpus besar)
 
+    Kalau `vectorstore` & `pasal_index` diberikan, dokumen di-append (incremental).
 
-def render_pasals(pasals: list) -> Tuple[str, list]:
+    `on_progress(stage, **info)` dipanggil per tahap: "loading" (pages),
+    "pasal_index" (pasal_index sudah lengkap & bisa dipakai), "embedding"
+    (done/total chunk). Callback boleh raise untuk membatalkan ingest.
     """
-    Render PASAL + isi lengkap + metadata sumber
+    if os.getenv("INGEST_MODE", "batch").lower() == "stream":
+        return ingest_streaming(files, vectorstore, pasal_index, on_progress=on_progress)
+
+    docs = load_documents(files, on_progress=on_progress)
+    stripper = get_boilerplate_stripper()
+    if stripper is not None:
+        with span("strip_boilerplate"):
+            docs = list(stripper.strip_all(docs))
+    _report(on_progress, "loading", pages=len(docs))
+
+    if vectorstore is None:
+        pasal_index = build_pasal_index(docs)
+        _report(on_progress, "pasal_index", pasal_index=pasal_index)
+        return create_vectorstore(docs, on_progress), pasal_index
+
+    add_documents(vectorstore, pasal_index, docs, on_progress)
+    return vectorstore, pasal_index
+
+
+# =========================================================
+# 3) PASAL INDEX (deterministic legal retrieval)
+# =========================================================
+
+def extract_pasals(docs) -> list:
+    """
+    Extract semua blok Pasal dari dokumen (lintas page break),
+    lengkap dengan BAB induk & offset ayat. Return list of Pasal.
+    """
+    extractor = PasalExtractor()
+    pasals = []
+    for d in docs:
+        pasals.extend(extractor.feed(d))
+    pasals.extend(extractor.finish())
+    return pasals
+
+
+@timed("build_pasal_index")
+def build_pasal_index(docs) -> PasalIndex:
+    """
+    extract_pasals + index terstruktur & BM25 (lihat legal_index.PasalIndex).
+    Teks pasal disimpan di docstore disk yang sama dengan vectorstore.
+    """
+    return PasalIndex(extract_pasals(docs), store=get_docstore())
+
+
+# =========================================================
+# 4) PASAL SCORING & FINDER
+# =========================================================
+
+def find_relevant_pasals(pasal_index: PasalIndex, query: str, top_k: int = 3) -> list:
+    """
+    Ranking BM25 di atas inverted index pasal (+ boost keyword sanksi).
+    """
+    return pasal_index.search(query, top_k=top_k)
+
+
+def render_pasals(pasals: list, ayat: Optional[int] = None) -> Tuple[str, list]:
+    """
+    Render BAB + PASAL + isi lengkap (atau satu ayat) + metadata sumber
     """
     blocks = []
     src_docs = []
 
     for p in pasals:
+        content, label = p.content, p.label
+        if ayat is not None:
+            text = p.ayat_text(ayat)
+            if text:
+                content, label = text, f"{p.label} ayat ({ayat})"
+
         block = (
-            f"{p['pasal_label']}\n"
-            f"{p['content']}\n\n"
-            f"(Sumber: {p['source']}"
-            + (f", halaman {p['page']})" if p["page"] is not None else ")")
+            (f"{p.bab}\n" if p.bab else "")
+            + f"{label}\n"
+            f"{content}\n\n"
+            f"(Sumber: {p.source}"
+            + (f", halaman {p.page})" if p.page is not None else ")")
         )
         blocks.append(block)
         src_docs.append(type("Doc", (), {
-            "page_content": p["content"],
+            "page_content": content,
             "metadata": {
-                "source": p["source"],
-                "page": p["page"],
+                "source": p.source,
+                "page": p.page,
             }
         }))
 
@@ -178,16 +735,56 @@ def render_pasals(pasals: list) -> Tuple[str, list]:
 # 5) GENERIC RAG ANSWER
 # =========================================================
 
-def rag_answer(vectorstore, query: str) -> Tuple[str, list]:
-    retriever = vectorstore.as_retriever(
-        search_type="mmr",
-        search_kwargs={"k": 6, "fetch_k": 20},
-    )
-    docs = retriever.invoke(query)
-
-    context = "\n\n".join(d.page_content for d in docs)
-
-    prompt = f"""
+def rag_answer_stream(vectorstore, query: str, index_version: Optional[str] = None,
+                      query_vector: Optional[List[float]] = None) -> Tuple[Iterator[str], list]:
+    """
+    Retrieval MMR (RETRIEVAL_K=6 dari RETRIEVAL_FETCH_K=20 kandidat)
+    -> context_packer (gabung overlap, dedupe, CONTEXT_TOKEN_BUDGET)
+    -> prompt -> ChatOllama (streaming).
+    Return (iterator token jawaban, source docs); retrieval sudah selesai
+    saat fungsi ini return, generasi LLM berjalan selama iterator dikonsumsi.
+
+    Kalau `index_version` diberikan, jawaban di-cache dua lapis:
+    - semantic cache: query yang mirip (cosine >= threshold) dengan query
+      yang sudah pernah dijawab di index ini langsung dapat jawaban itu;
+    - response cache: exact match (model, temperature, index_version, prompt).
+    Cache diisi setelah stream selesai dikonsumsi.
+
+    `query_vector` = embedding `query` yang sudah dihitung (mis. batch di
+    batch_qa.py); kalau None, query di-embed di sini.
+    """
+    model = get_llm_model()
+    temperature = 0.3
+
+    with span("rag_answer") as outer:
+        # embed query sekali: dipakai untuk semantic cache & retrieval
+        if query_vector is None:
+            with span("rag_answer.embed_query"):
+                query_vector = vectorstore.embeddings.embed_query(query)
+
+        semantic = get_semantic_cache(f"{index_version}|{model}") if index_version else None
+        if semantic is not None:
+            with span("rag_answer.semantic_cache"):
+                hit = semantic.lookup(query, query_vector)
+            if hit is not None:
+                outer["result"] = "semantic_hit"
+                answer, docs = hit
+                return iter([answer]), docs
+
+        with span("rag_answer.retrieve"):
+            docs = vectorstore.max_marginal_relevance_search_by_vector(
+                query_vector,
+                k=int(os.getenv("RETRIEVAL_K", "6")),
+                fetch_k=int(os.getenv("RETRIEVAL_FETCH_K", "20")),
+            )
+
+        with span("rag_answer.prompt"):
+            if os.getenv("CONTEXT_PACKING", "1") == "0":
+                context = "\n\n".join(d.page_content for d in docs)
+            else:
+                context, _ = pack_context(docs)
+
+            prompt = f"""
 Jawab secara DESKRIPTIF dan sesuai konteks dokumen.
 Jangan menambah aturan di luar konteks.
 
@@ -200,63 +797,176 @@ PERTANYAAN:
 JAWABAN:
 """
 
-    llm = ChatOllama(
-        model=os.getenv("OLLAMA_MODEL", "llama3.2:3b"),
-        temperature=0.3,
-    )
-    msg = llm.invoke(prompt)
-    answer = msg.content if hasattr(msg, "content") else str(msg)
-
-    return answer, docs
+        cache = get_response_cache() if index_version else None
+        if cache is not None:
+            with span("rag_answer.response_cache"):
+                hit = cache.lookup(model, temperature, index_version, prompt)
+            if hit is not None:
+                outer["result"] = "cache_hit"
+                if semantic is not None:
+                    semantic.store(query, query_vector, *hit)
+                answer, docs = hit
+                return iter([answer]), docs
+
+        outer["result"] = "llm"
+        llm = get_llm(temperature=temperature, model=model)
+
+    def tokens() -> Iterator[str]:
+        # generasi LLM terjadi saat iterator dikonsumsi, di luar span di atas
+        metrics = get_metrics()
+        start = time.perf_counter()
+        first = None
+        parts = []
+        for chunk in llm.stream(prompt):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if text:
+                if first is None:
+                    first = time.perf_counter() - start
+                    metrics.observe("rag_answer.llm_first_token", first, model=model)
+                parts.append(text)
+                yield text
+        metrics.observe("rag_answer.llm_generate", time.perf_counter() - start, model=model)
+
+        answer = "".join(parts)
+        if cache is not None:
+            cache.store(model, temperature, index_version, prompt, answer, docs)
+        if semantic is not None:
+            semantic.store(query, query_vector, answer, docs)
+
+    return tokens(), docs
+
+
+def rag_answer(vectorstore, query: str, index_version: Optional[str] = None) -> Tuple[str, list]:
+    """
+    Versi non-streaming dari rag_answer_stream.
+    """
+    tokens, docs = rag_answer_stream(vectorstore, query, index_version)
+    return "".join(tokens), docs
 
 
 # =========================================================
 # 6) ROUTER (INTENT-AWARE)
 # =========================================================
 
-def route_question(vectorstore, pasal_index: list, query: str) -> Tuple[str, list]:
-    q = query.lower()
+def _as_stream(result: Tuple[str, list]) -> Tuple[Iterator[str], list]:
+    text, docs = result
+    return iter([text]), docs
 
-    # --- A) Pasal sanksi / hukuman
-    if any(k in q for k in SANCTION_KEYWORDS):
-        pasals = find_relevant_pasals(pasal_index, query, top_k=5)
-        if pasals:
-            return render_pasals(pasals)
 
-    # --- B) Tanya pasal tertentu (Pasal X)
-    m = re.search(r"pasal\s+(\d+)", q)
-    if m:
-        target = int(m.group(1))
-        pasals = [p for p in pasal_index if p["pasal_no"] == target]
-        if pasals:
-            return render_pasals(pasals)
+def route_question_stream(vectorstore, pasal_index: PasalIndex, query: str, index_version: Optional[str] = None,
+                          query_vectors: Optional[Dict[str, List[float]]] = None) -> Tuple[Iterator[str], list]:
+    """
+    Router intent -> (iterator token jawaban, source docs).
+    Route pasal (deterministik) menghasilkan satu token berisi teks lengkap,
+    route LLM men-stream token dari ChatOllama.
+
+    `index_version` (mis. index_key dari index_store) mengaktifkan
+    cache jawaban LLM di rag_answer_stream.
+
+    `vectorstore` boleh None selama embedding masih berjalan (ingest di
+    background): route pasal/BAB tetap dijawab, route LLM belum.
+
+    `query_vectors` = {teks retrieval: embedding} yang sudah dihitung di
+    depan (lihat rag_query); route LLM yang teksnya ada di sini tidak
+    meng-embed ulang.
+
+    Latency dicatat sebagai span "route_question" dengan label route
+    (sanction | pasal | bab | pending | about | summary | obligations |
+    cases | default), lihat metrics.py.
+    """
+    return routed_answer_stream(vectorstore, pasal_index, query, index_version, query_vectors)[1]
+
+
+def routed_answer_stream(vectorstore, pasal_index: PasalIndex, query: str, index_version: Optional[str] = None,
+                         query_vectors: Optional[Dict[str, List[float]]] = None) -> Tuple[str, Tuple[Iterator[str], list]]:
+    """
+    Sama dengan route_question_stream, plus nama route yang dipilih:
+    return (route, (iterator token jawaban, source docs)).
+    """
+    with span("route_question") as s:
+        route, result = _route_question(vectorstore, pasal_index, query, index_version, query_vectors)
+        s["route"] = route
+    return route, result
+
+
+def rag_query(query: str) -> Tuple[str, str]:
+    """
+    Route LLM (C-F + default) untuk `query`: return (nama route, teks yang
+    di-embed & dikirim ke rag_answer_stream). Dipakai _route_question dan
+    batch_qa.py (embedding query di-batch sebelum routing).
+    """
+    q = query.lower()
 
     # --- C) Tentang apa UU Nomor X Tahun Y
     if "tentang apa" in q or "itu tentang apa" in q:
-        return rag_answer(vectorstore, query)
+        return "about", query
 
     # --- D) Ringkasan dokumen
     if "ringkas" in q or "ringkasan" in q:
-        prompt = f"Ringkas isi dokumen secara tematik.\n\n{query}"
-        return rag_answer(vectorstore, prompt)
+        return "summary", f"Ringkas isi dokumen secara tematik.\n\n{query}"
 
     # --- E) Kewajiban & larangan
     if "kewajiban" in q or "larangan" in q:
-        prompt = f"""
+        return "obligations", """
 Dari dokumen, buatkan:
 - Poin KEWAJIBAN
 - Poin LARANGAN
 Gunakan bullet point.
 """
-        return rag_answer(vectorstore, prompt)
 
     # --- F) Contoh kasus
     if "contoh" in q or "kasus" in q:
-        prompt = f"""
+        return "cases", """
 Berdasarkan dokumen, berikan CONTOH KASUS PENERAPAN.
 Jangan menambah aturan di luar dokumen.
 """
-        return rag_answer(vectorstore, prompt)
 
     # --- Default fallback
-    return rag_answer(vectorstore, query)
+    return "default", query
+
+
+def _route_question(vectorstore, pasal_index: PasalIndex, query: str, index_version: Optional[str],
+                    query_vectors: Optional[Dict[str, List[float]]] = None) -> Tuple[str, Tuple[Iterator[str], list]]:
+    """Pilih route untuk `query`; return (nama route, (iterator token, docs))."""
+    q = query.lower()
+
+    # --- A) Pasal sanksi / hukuman
+    if any(k in q for k in SANCTION_KEYWORDS):
+        pasals = find_relevant_pasals(pasal_index, query, top_k=5)
+        if pasals:
+            return "sanction", _as_stream(render_pasals(pasals))
+
+    # --- B) Tanya pasal tertentu (Pasal X [ayat (Y)])
+    m = re.search(r"pasal\s+(\d+)(?:\s+ayat\s+\(?(\d+)\)?)?", q)
+    if m:
+        pasals = pasal_index.get_pasal(int(m.group(1)))
+        if pasals:
+            ayat = int(m.group(2)) if m.group(2) else None
+            return "pasal", _as_stream(render_pasals(pasals, ayat=ayat))
+
+    # --- B2) Tanya BAB tertentu (BAB X)
+    m = re.search(r"\bbab\s+([ivxlcdm]+)\b", q)
+    if m:
+        pasals = pasal_index.get_bab(m.group(1))
+        if pasals:
+            return "bab", _as_stream(render_pasals(pasals))
+
+    if vectorstore is None:
+        return "pending", _as_stream((
+            "Dokumen masih di-embed di background. Untuk sementara yang bisa dijawab "
+            "hanya pertanyaan **Pasal X**, **BAB X**, atau pasal sanksi.",
+            [],
+        ))
+
+    route, text = rag_query(query)
+    vector = (query_vectors or {}).get(text)
+    return route, rag_answer_stream(vectorstore, text, index_version, vector)
+
+
+def route_question(vectorstore, pasal_index: PasalIndex, query: str, index_version: Optional[str] = None,
+                   query_vectors: Optional[Dict[str, List[float]]] = None) -> Tuple[str, list]:
+    """
+    Versi non-streaming dari route_question_stream.
+    """
+    tokens, docs = route_question_stream(vectorstore, pasal_index, query, index_version, query_vectors)
+    return "".join(tokens), docs
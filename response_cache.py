@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from cache_store import DiskLRUCache, cache_dir
+
+
+class ResponseCache:
+    """
+    Cache jawaban LLM (exact match).
+    Key = sha256(model, temperature, index version, prompt lengkap),
+    value = jawaban + source docs (JSON).
+    """
+
+    def __init__(self, cache: DiskLRUCache):
+        self.cache = cache
+
+    @staticmethod
+    def _key(model: str, temperature: float, index_version: str, prompt: str) -> str:
+        h = hashlib.sha256()
+        for part in (model, repr(float(temperature)), index_version, prompt):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def lookup(self, model: str, temperature: float, index_version: str, prompt: str) -> Optional[Tuple[str, list]]:
+        raw = self.cache.get(self._key(model, temperature, index_version, prompt))
+        if raw is None:
+            return None
+
+        data = json.loads(raw.decode("utf-8"))
+        docs = [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in data["docs"]]
+        return data["answer"], docs
+
+    def store(self, model: str, temperature: float, index_version: str, prompt: str,
+              answer: str, docs: List[Document]) -> None:
+        data = {
+            "answer": answer,
+            "docs": [{"page_content": d.page_content, "metadata": d.metadata} for d in docs],
+        }
+        raw = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.cache.put(self._key(model, temperature, index_version, prompt), raw)
+
+
+_RESPONSE_CACHE = None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Cache jawaban LLM on-disk (shared antar sesi).
+
+      RESPONSE_CACHE             = 1 | 0   (default: 1)
+      RESPONSE_CACHE_TTL         = detik   (default: 86400, 0 = tanpa TTL)
+      RESPONSE_CACHE_MAX_ENTRIES = int     (default: 5000)
+    """
+    if os.getenv("RESPONSE_CACHE", "1") == "0":
+        return None
+
+    global _RESPONSE_CACHE
+    with _RESPONSE_CACHE_LOCK:
+        if _RESPONSE_CACHE is None:
+            ttl = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+            _RESPONSE_CACHE = ResponseCache(DiskLRUCache(
+                os.path.join(cache_dir(), "responses.sqlite"),
+                max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000")),
+                ttl=ttl or None,
+            ))
+        return _RESPONSE_CACHE
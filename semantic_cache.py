@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from dedupe import number_key
+
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Cache jawaban untuk pertanyaan yang mirip (bukan harus identik).
+
+    Menyimpan embedding query yang sudah pernah dijawab (ternormalisasi,
+    satu matriks numpy) + jawaban & source docs. Lookup = cosine similarity
+    ke semua query tersimpan; hit kalau skor tertinggi >= threshold.
+    Hanya query dengan angka yang sama (dedupe.number_key) yang dibandingkan:
+    "UU Nomor 27 Tahun 2022" dan "UU Nomor 28 Tahun 2022" hampir identik
+    bagi embedder, tapi jawabannya dari UU yang lain.
+    Kapasitas dibatasi `max_entries` (yang paling lama tidak dipakai dibuang).
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 500):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Tuple[str, str, list]] = []  # (query, answer, docs)
+        self._numbers: List[tuple] = []
+        self._last_used: List[int] = []
+        self._tick = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm > 0 else v
+
+    def lookup(self, query: str, vector) -> Optional[Tuple[str, list]]:
+        v = self._normalize(vector)
+        numbers = number_key(query)
+        with self._lock:
+            self._tick += 1
+            if self._vectors is not None and len(self._entries):
+                sims = self._vectors @ v
+                for i, other in enumerate(self._numbers):
+                    if other != numbers:
+                        sims[i] = -np.inf
+                best = int(np.argmax(sims))
+                if float(sims[best]) >= self.threshold:
+                    self.hits += 1
+                    self._last_used[best] = self._tick
+                    _, answer, docs = self._entries[best]
+                    return answer, docs
+            self.misses += 1
+        return None
+
+    def store(self, query: str, vector, answer: str, docs: list) -> None:
+        v = self._normalize(vector)[None, :]
+        with self._lock:
+            self._tick += 1
+            if self._vectors is not None and len(self._entries) >= self.max_entries:
+                drop = int(np.argmin(self._last_used))
+                self._vectors = np.delete(self._vectors, drop, axis=0)
+                del self._entries[drop]
+                del self._last_used[drop]
+                del self._numbers[drop]
+
+            self._vectors = v if self._vectors is None else np.vstack([self._vectors, v])
+            self._entries.append((query, answer, docs))
+            self._numbers.append(number_key(query))
+            self._last_used.append(self._tick)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+_CACHES: "OrderedDict[str, SemanticCache]" = OrderedDict()
+_CACHES_LOCK = threading.Lock()
+_MAX_INDEXES = 32
+
+
+def get_semantic_cache(index_version: str) -> Optional[SemanticCache]:
+    """
+    Satu SemanticCache per index (dipakai bersama semua sesi di proses ini).
+
+      SEMANTIC_CACHE             = 1 | 0   (default: 1)
+      SEMANTIC_CACHE_THRESHOLD   = cosine  (default: 0.95)
+      SEMANTIC_CACHE_MAX_ENTRIES = int     (default: 500, per index)
+    """
+    if os.getenv("SEMANTIC_CACHE", "1") == "0":
+        return None
+
+    with _CACHES_LOCK:
+        cache = _CACHES.get(index_version)
+        if cache is None:
+            cache = SemanticCache(
+                threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+                max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500")),
+            )
+            _CACHES[index_version] = cache
+            while len(_CACHES) > _MAX_INDEXES:
+                _CACHES.popitem(last=False)
+        else:
+            _CACHES.move_to_end(index_version)
+        return cache
+
+
+def semantic_cache_stats() -> Dict[str, Dict[str, float]]:
+    with _CACHES_LOCK:
+        return {k: c.stats() for k, c in _CACHES.items()}
@@ -0,0 +1,271 @@
+import math
+import os
+from typing import List, Optional
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from docstore import SQLiteDocstore, new_vector_docstore
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+
+
+def index_type() -> str:
+    """
+    FAISS_INDEX_TYPE = flat | hnsw | ivf | ivfpq   (default: flat)
+
+    flat  : exact search (IndexFlatL2), cocok untuk korpus kecil/sedang
+    hnsw  : graph ANN (IndexHNSWFlat), tanpa training, cepat
+    ivf   : IVF-Flat, butuh training (k-means) pada sampel
+    ivfpq : IVF + product quantization, vektor dikompres (hemat memori)
+    """
+    kind = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+    if kind not in INDEX_TYPES:
+        raise ValueError(
+            f"FAISS_INDEX_TYPE tidak dikenali: '{kind}'.\n"
+            "Gunakan salah satu: flat | hnsw | ivf | ivfpq"
+        )
+    return kind
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _auto_nlist(n: int) -> int:
+    # rule of thumb: ~4*sqrt(n) cluster, minimal 39 titik training per cluster
+    nlist = _env_int("FAISS_IVF_NLIST", 0) or int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // 39))
+
+
+def _pq_m(dim: int) -> int:
+    # jumlah sub-quantizer harus membagi dimensi
+    m = min(_env_int("FAISS_PQ_M", 32), dim)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def _pq_nbits(n_train: int) -> int:
+    # tiap codebook PQ punya 2**nbits centroid: k-means-nya butuh >= 2**nbits
+    # titik training (idealnya 39 per centroid), jadi nbits dikecilkan untuk sampel kecil
+    nbits = _env_int("FAISS_PQ_NBITS", 8)
+    while nbits > 1 and n_train < 39 * 2 ** nbits:
+        nbits -= 1
+    return nbits
+
+
+def _new_index(kind: str, dim: int, n_train: int) -> faiss.Index:
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, _env_int("FAISS_HNSW_M", 32))
+        index.hnsw.efConstruction = _env_int("FAISS_HNSW_EF_CONSTRUCTION", 80)
+        return index
+
+    if kind in ("ivf", "ivfpq"):
+        nlist = _auto_nlist(n_train)
+        quantizer = faiss.IndexFlatL2(dim)
+        if kind == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_m(dim), _pq_nbits(n_train))
+        return index
+
+    return faiss.IndexFlatL2(dim)
+
+
+def index_signature() -> str:
+    """
+    Setting FAISS yang mengubah isi index di disk, untuk index_key.
+    Knob search (FAISS_NPROBE, FAISS_HNSW_EF_SEARCH) tidak termasuk.
+    """
+    kind = index_type()
+    if kind == "flat":
+        return kind
+    params = [kind, _env_int("FAISS_ANN_MIN_VECTORS", 10000)]
+    if kind == "hnsw":
+        params += [_env_int("FAISS_HNSW_M", 32), _env_int("FAISS_HNSW_EF_CONSTRUCTION", 80)]
+    else:
+        params += [_env_int("FAISS_TRAIN_SIZE", 20000), _env_int("FAISS_IVF_NLIST", 0)]
+        if kind == "ivfpq":
+            params += [_env_int("FAISS_PQ_M", 32), _env_int("FAISS_PQ_NBITS", 8)]
+    return ":".join(str(p) for p in params)
+
+
+def apply_search_params(index: faiss.Index) -> None:
+    """
+    Knob recall/latency saat search (bukan bagian dari index di disk):
+
+      FAISS_NPROBE         = cluster IVF yang diperiksa per query (default: 8)
+      FAISS_HNSW_EF_SEARCH = lebar beam HNSW saat search (default: 64)
+
+    IVF juga diberi direct map (posisi -> vektor): MMR LangChain memanggil
+    index.reconstruct() untuk tiap kandidat. Dipanggil setelah training
+    (sebelum add, map ikut terisi saat add) dan setelah load.
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf.nprobe = min(_env_int("FAISS_NPROBE", 8), ivf.nlist)
+        ivf.make_direct_map()
+
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = _env_int("FAISS_HNSW_EF_SEARCH", 64)
+
+
+# =========================================================
+# BUILDER
+# =========================================================
+
+class VectorIndexBuilder:
+    """
+    Bangun FAISS vectorstore dari batch (teks, vektor, metadata, id).
+
+    - flat / hnsw : batch langsung di-add.
+    - ivf / ivfpq : batch ditahan sampai FAISS_TRAIN_SIZE vektor terkumpul
+                    (default: 20000), index di-train pada sampel itu, lalu
+                    semua batch berikutnya langsung di-add.
+    Korpus yang lebih kecil dari FAISS_ANN_MIN_VECTORS (default: 10000)
+    selalu pakai flat: ANN tidak memberi manfaat di ukuran itu.
+    """
+
+    def __init__(self, embeddings: Embeddings, vectorstore: Optional[FAISS] = None):
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        self.kind = index_type()
+        self.min_vectors = _env_int("FAISS_ANN_MIN_VECTORS", 10000)
+        self.train_size = max(_env_int("FAISS_TRAIN_SIZE", 20000), self.min_vectors)
+        self._pending: List[tuple] = []
+        self._pending_count = 0
+
+    def add(self, texts: List[str], vectors: List[List[float]], metadatas: List[dict], ids: List[str]) -> None:
+        if not texts:
+            return
+
+        if self.vectorstore is not None:
+            self._add(texts, vectors, metadatas, ids)
+            return
+
+        self._pending.append((list(texts), vectors, list(metadatas), list(ids)))
+        self._pending_count += len(texts)
+
+        if self.kind == "flat":
+            threshold = 0
+        elif self.kind in ("ivf", "ivfpq"):
+            threshold = self.train_size
+        else:
+            threshold = self.min_vectors
+
+        if self._pending_count >= threshold:
+            self._build(self.kind)
+
+    def finish(self) -> Optional[FAISS]:
+        if self.vectorstore is None and self._pending:
+            kind = self.kind if self._pending_count >= self.min_vectors else "flat"
+            self._build(kind)
+        return self.vectorstore
+
+    def _add(self, texts, vectors, metadatas, ids) -> None:
+        self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+
+    def _build(self, kind: str) -> None:
+        dim = len(self._pending[0][1][0])
+        index = _new_index(kind, dim, self._pending_count)
+
+        if not index.is_trained:
+            sample = np.asarray(
+                [v for _, vectors, _, _ in self._pending for v in vectors],
+                dtype=np.float32,
+            )
+            index.train(sample)
+        apply_search_params(index)
+
+        self.vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=new_vector_docstore(),
+            index_to_docstore_id={},
+        )
+        pending, self._pending, self._pending_count = self._pending, [], 0
+        for batch in pending:
+            self._add(*batch)
+
+
+# =========================================================
+# DELETE
+# =========================================================
+
+def delete_vectors(vectorstore: FAISS, ids: List[str]) -> None:
+    """
+    Hapus vektor by docstore id.
+
+    FAISS.delete() hanya benar untuk IndexFlat (remove_ids memadatkan posisi).
+    HNSW tidak mendukung remove_ids dan label IVF tidak dipadatkan, jadi
+    untuk tipe lain index dibangun ulang dari vektor yang tersisa
+    (reconstruct), tanpa training ulang.
+    """
+    index = vectorstore.index
+    if isinstance(index, faiss.IndexFlat):
+        vectorstore.delete(ids)
+        return
+
+    stale = set(ids)
+    keep = [
+        pos for pos, _id in sorted(vectorstore.index_to_docstore_id.items())
+        if _id not in stale
+    ]
+
+    try:
+        faiss.extract_index_ivf(index).make_direct_map()
+    except RuntimeError:
+        pass
+
+    rebuilt = faiss.clone_index(index)
+    rebuilt.reset()
+    if keep:
+        vectors = np.vstack([index.reconstruct(int(pos)) for pos in keep])
+        rebuilt.add(vectors)
+    apply_search_params(rebuilt)
+
+    vectorstore.index = rebuilt
+    vectorstore.docstore.delete(list(stale))
+    vectorstore.index_to_docstore_id = {
+        new_pos: vectorstore.index_to_docstore_id[old_pos]
+        for new_pos, old_pos in enumerate(keep)
+    }
+
+
+# =========================================================
+# COPY
+# =========================================================
+
+def clone_vectorstore(vectorstore: FAISS) -> FAISS:
+    """
+    Salinan vectorstore yang bisa diubah tanpa mempengaruhi aslinya
+    (index FAISS di-clone; docstore disk disalin ke namespace baru,
+    docstore in-memory disalin).
+    """
+    docstore = vectorstore.docstore
+    if isinstance(docstore, InMemoryDocstore):
+        docstore = InMemoryDocstore(dict(docstore._dict))
+    elif isinstance(docstore, SQLiteDocstore):
+        docstore = docstore.fork()
+
+    index = faiss.clone_index(vectorstore.index)
+    apply_search_params(index)
+
+    return FAISS(
+        embedding_function=vectorstore.embedding_function,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(vectorstore.index_to_docstore_id),
+    )
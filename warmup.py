@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from embedding_factory import get_embedding_model, get_embeddings
+from llm_factory import get_llm_model
+
+
+logger = logging.getLogger(__name__)
+
+
+def _keep_alive() -> str:
+    return os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+
+def _ollama_client():
+    import ollama
+
+    return ollama.Client(host=os.getenv("OLLAMA_BASE_URL"))
+
+
+def preload_llm() -> None:
+    """
+    Load OLLAMA_MODEL ke memori server Ollama tanpa generate apa-apa
+    (prompt kosong = load saja), dengan keep_alive OLLAMA_KEEP_ALIVE.
+    """
+    _ollama_client().generate(model=get_llm_model(), prompt="", keep_alive=_keep_alive())
+
+
+def preload_embeddings() -> None:
+    """
+    Provider ollama: load model embedding di server (keep_alive sama).
+    Provider lain: satu embed_query supaya model/client sudah siap.
+    """
+    provider, model = get_embedding_model()
+    if provider == "ollama":
+        _ollama_client().embeddings(model=model, prompt="warmup", keep_alive=_keep_alive())
+    else:
+        get_embeddings().embed_query("warmup")
+
+
+class ModelWarmup:
+    """
+    Warm-up LLM + embedding model di background saat startup, lalu heartbeat
+    berkala supaya model tetap resident di Ollama selama app masih dipakai.
+
+      OLLAMA_KEEP_ALIVE        = durasi model tetap di memori (default: 30m)
+      OLLAMA_HEARTBEAT_SECONDS = interval heartbeat (default: 240, 0 = mati)
+      OLLAMA_IDLE_TIMEOUT      = berhenti heartbeat kalau app tidak dipakai
+                                 selama N detik (default: 1800)
+    """
+
+    def __init__(self):
+        self.status: Dict[str, str] = {"llm": "pending", "embeddings": "pending"}
+        self.last_heartbeat: Optional[float] = None
+        self._last_activity = time.time()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ModelWarmup":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def touch(self) -> None:
+        """Tandai app sedang dipakai (panggil tiap rerun / request)."""
+        self._last_activity = time.time()
+
+    def _load(self, name: str, fn) -> None:
+        self.status[name] = "loading"
+        start = time.perf_counter()
+        try:
+            fn()
+            self.status[name] = f"ready ({time.perf_counter() - start:.1f}s)"
+        except Exception as e:
+            self.status[name] = f"error: {e}"
+            logger.warning("warm-up %s gagal: %s", name, e)
+
+    def _run(self) -> None:
+        self._load("embeddings", preload_embeddings)
+        self._load("llm", preload_llm)
+
+        interval = float(os.getenv("OLLAMA_HEARTBEAT_SECONDS", "240"))
+        idle_timeout = float(os.getenv("OLLAMA_IDLE_TIMEOUT", "1800"))
+        if interval <= 0:
+            return
+
+        while not self._stop.wait(interval):
+            if time.time() - self._last_activity > idle_timeout:
+                # app idle: biarkan Ollama meng-evict model
+                continue
+            try:
+                # model non-Ollama (hf/openai) tidak perlu di-ping
+                if get_embedding_model()[0] == "ollama":
+                    preload_embeddings()
+                preload_llm()
+                self.last_heartbeat = time.time()
+            except Exception as e:
+                logger.warning("heartbeat model gagal: %s", e)